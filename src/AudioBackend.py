@@ -0,0 +1,289 @@
+"""
+AudioBackend.py
+IX-Futakuchi-onna : Pluggable audio I/O backends for emitter and feedback monitor
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+BeamEmitterController and FeedbackLockMonitor talk to audio hardware only through a backend:
+ - SoundDeviceBackend: real DAC/ADC I/O via sounddevice (imported on first use)
+ - SimulatedChannel: in-memory channel connecting emitter output to monitor input with
+   configurable delay, attenuation and noise, plus an optional paired-receiver handshake.
+   Nothing waits on the wall clock, so full transmit/handshake cycles run as fast as the CPU allows.
+
+Backend interface:
+    realtime                                         True if I/O is paced by a real clock
+    play(waveform, sample_rate, device)              blocking playback
+    record(num_samples, sample_rate, device, dtype)  blocking capture, returns (num_samples, 1)
+    output_stream(sample_rate, block_size, device, callback)
+    input_stream(sample_rate, block_size, device, callback, dtype)
+    pause(seconds)                                   inter-emission gap
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Samples of channel noise drawn per step in SimulatedChannel.read
+NOISE_BLOCK = 65536
+
+
+class SoundDeviceBackend:
+    realtime = True
+
+    def play(self, waveform, sample_rate, device=None):
+        import sounddevice as sd
+        sd.play(waveform, samplerate=sample_rate, device=device)
+        sd.wait()
+
+    def record(self, num_samples, sample_rate, device=None, dtype='float64'):
+        import sounddevice as sd
+        recording = sd.rec(num_samples, samplerate=sample_rate, channels=1, dtype=dtype, device=device)
+        sd.wait()
+        return recording
+
+    def output_stream(self, sample_rate, block_size, device, callback):
+        import sounddevice as sd
+        return sd.OutputStream(samplerate=sample_rate, blocksize=block_size, device=device,
+                               channels=1, dtype='float32', callback=callback)
+
+    def input_stream(self, sample_rate, block_size, device, callback, dtype='float64'):
+        import sounddevice as sd
+        return sd.InputStream(samplerate=sample_rate, blocksize=block_size, device=device,
+                              channels=1, dtype=dtype, callback=callback)
+
+    def pause(self, seconds):
+        time.sleep(seconds)
+
+
+class NullOutputStream:
+    """
+    Hardware-free output stream for headless runs and tests.
+    Pulls blocks from the callback on a background thread as fast as possible while audio is queued,
+    and at real-time pace while idle. paced=False polls an idle callback every IDLE_POLL seconds
+    instead, so throughput benchmarks don't measure block-length sleeps.
+    With capture=True every pulled block is kept in self.captured.
+    sink, if given, receives every non-silent block (used by SimulatedChannel for loopback).
+    """
+
+    IDLE_POLL = 0.0005
+
+    def __init__(self, sample_rate, block_size, device, callback, capture=False, sink=None, paced=True):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.callback = callback
+        self.capture = capture
+        self.sink = sink
+        self.paced = paced
+        self.captured = []
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()  # Also cuts short an idle wait, so stop() doesn't wait out a block
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        pass
+
+    def output(self):
+        """
+        Concatenated captured output.
+        """
+        if not self.captured:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(self.captured)
+
+    def _run(self):
+        idle_wait = self.block_size / self.sample_rate if self.paced else self.IDLE_POLL
+        while not self._stopped.is_set():
+            outdata = np.zeros((self.block_size, 1), dtype=np.float32)
+            self.callback(outdata, self.block_size, None, None)
+            if self.capture:
+                self.captured.append(outdata[:, 0])
+            if not outdata.any():
+                self._stopped.wait(idle_wait)
+            elif self.sink is not None:
+                self.sink(outdata[:, 0])
+
+
+class SimulatedChannel:
+    """
+    Simulated field channel between emitter and monitor.
+
+    delay: propagation delay in seconds applied to everything entering the receive path
+    attenuation: linear gain applied to everything entering the receive path
+    noise_std: Gaussian noise added to every captured sample (including silence)
+    loopback: route emitted waveforms back into the receive path
+    handshake: waveform the paired receiver sends back whenever a capture starts
+    """
+    realtime = False
+
+    def __init__(self, sample_rate=44100, delay=0.0, attenuation=1.0, noise_std=0.0,
+                 loopback=False, handshake=None, seed=None):
+        self.sample_rate = sample_rate
+        self.delay = delay
+        self.attenuation = attenuation
+        self.noise_std = noise_std
+        self.loopback = loopback
+        self.handshake = None if handshake is None else np.asarray(handshake, dtype=np.float64)
+        self.rng = np.random.default_rng(seed)
+
+        self.emitted = []  # One entry per blocking play() call, i.e. per whole-waveform emission
+        self.stream_blocks = []  # Per-block capture of output streams (non-silent blocks, in order)
+        self._pending = deque()  # Receive-path segments not yet captured
+        self._lock = threading.Lock()
+
+    def inject(self, signal):
+        """
+        Sends a signal into the receive path (subject to delay and attenuation).
+        """
+        self._enqueue(signal, handshake=False)
+
+    def _enqueue(self, signal, handshake):
+        delayed = np.concatenate([np.zeros(int(round(self.delay * self.sample_rate))),
+                                  np.asarray(signal, dtype=np.float64) * self.attenuation])
+        with self._lock:
+            self._pending.append((delayed, handshake))
+
+    def respond(self):
+        """
+        Capture start: the paired receiver answers with a fresh handshake.
+        Unread remains of an earlier handshake are dropped; other pending signals are kept.
+        """
+        with self._lock:
+            self._pending = deque(item for item in self._pending if not item[1])
+        if self.handshake is not None:
+            self._enqueue(self.handshake, handshake=True)
+
+    def play(self, waveform, sample_rate=None, device=None):
+        self.emitted.append(np.asarray(waveform))
+        if self.loopback:
+            self.inject(waveform)
+
+    def record(self, num_samples, sample_rate=None, device=None, dtype='float64'):
+        self.respond()
+        return self.read(num_samples, dtype)
+
+    def read(self, num_samples, dtype='float64'):
+        """
+        Pulls the next num_samples from the receive path (zeros once it runs dry) plus channel noise.
+        """
+        recording = np.zeros(num_samples, dtype=dtype)
+        filled = 0
+        with self._lock:
+            while filled < num_samples and self._pending:
+                segment, handshake = self._pending[0]
+                take = min(len(segment), num_samples - filled)
+                recording[filled:filled + take] = segment[:take]
+                filled += take
+                if take == len(segment):
+                    self._pending.popleft()
+                else:
+                    self._pending[0] = (segment[take:], handshake)
+
+        if self.noise_std > 0:
+            # Drawn block by block: the same noise stream as one full-size draw, without a
+            # full-size float64 temporary when recording in float32
+            for start in range(0, num_samples, NOISE_BLOCK):
+                stop = min(start + NOISE_BLOCK, num_samples)
+                recording[start:stop] += self.rng.normal(0.0, self.noise_std, size=stop - start)
+        return recording[:, np.newaxis]
+
+    def output_stream(self, sample_rate, block_size, device, callback):
+        return NullOutputStream(sample_rate, block_size, device, callback, sink=self._stream_block)
+
+    def _stream_block(self, block):
+        """
+        Output-stream sink. Streams carry back-to-back buffers with no emission boundaries,
+        so blocks are kept in stream_blocks rather than counted as emissions.
+        """
+        self.stream_blocks.append(np.array(block))
+        if self.loopback:
+            self.inject(block)
+
+    def input_stream(self, sample_rate, block_size, device, callback, dtype='float64'):
+        return _SimulatedInputStream(self, block_size, callback, dtype)
+
+    def pause(self, seconds):
+        pass
+
+
+class _SimulatedInputStream:
+    """
+    Feeds captured blocks to an input callback from a background thread, unpaced.
+    """
+
+    def __init__(self, channel, block_size, callback, dtype='float64'):
+        self.channel = channel
+        self.block_size = block_size
+        self.callback = callback
+        self.dtype = dtype
+        self._running = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        self.close()
+
+    def start(self):
+        self.channel.respond()
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        pass
+
+    def _run(self):
+        while self._running.is_set():
+            block = self.channel.read(self.block_size, self.dtype)
+            self.callback(block, self.block_size, None, None)
+
+
+if __name__ == "__main__":
+    from TransmissionOrchestrator import TransmissionOrchestrator
+    import logging
+    import soundfile as sf
+    import tempfile
+    import os
+
+    sample_rate = 44100
+    t = np.arange(sample_rate) / sample_rate
+    handshake = sum(0.1 * np.sin(2 * np.pi * 111 * h * t) for h in (3, 6, 9))
+    channel = SimulatedChannel(sample_rate=sample_rate, delay=0.02, attenuation=0.8,
+                               noise_std=0.001, handshake=handshake, seed=369)
+
+    logging.basicConfig(level=logging.WARNING)
+    with tempfile.TemporaryDirectory() as workdir:
+        wav_path = os.path.join(workdir, "hello.wav")
+        sf.write(wav_path, 0.5 * np.sin(2 * np.pi * 111 * t), sample_rate)
+
+        orchestrator = TransmissionOrchestrator(sample_rate=sample_rate, backend=channel)
+        sessions = 200
+        start = time.perf_counter()
+        for _ in range(sessions):
+            orchestrator.transmit(wav_path, secure=True, require_lock=True)
+        elapsed = time.perf_counter() - start
+
+    print(f"[SIM] {len(channel.emitted)}/{sessions} sessions emitted "
+          f"({sessions / elapsed * 60:.0f} sessions/min)")
@@ -11,18 +11,36 @@ such as a Tesla coil, laser diode, or RF amplifier, using either digital audio o
 """
 
 import numpy as np
-import sounddevice as sd
-import time
+import queue
+import threading
+from AudioBackend import SoundDeviceBackend
 
 
 class BeamEmitterController:
-    def __init__(self, sample_rate=44100, device=None):
+    def __init__(self, sample_rate=44100, device=None, block_size=1024, queue_depth=2, stream_factory=None,
+                 backend=None):
         """
         Initializes audio output system.
         Use default sound output or specify external DAC device.
+
+        backend: audio backend (see AudioBackend.py); defaults to sounddevice hardware output.
+        Stream mode: a persistent output stream plays pre-scaled buffers from a bounded queue
+        (queue_depth=2 gives double buffering). stream_factory(sample_rate, block_size, device, callback)
+        overrides the backend's output stream, e.g. NullOutputStream for headless runs.
         """
         self.sample_rate = sample_rate
         self.device = device  # Optional: specific DAC or audio interface name
+        self.block_size = block_size
+        self.backend = backend or SoundDeviceBackend()
+        self.stream_factory = stream_factory or self.backend.output_stream
+
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self._stream = None
+        self._current = None      # Buffer currently being played by the callback
+        self._position = 0        # Read position inside the current buffer
+        self._pending = 0         # Buffers queued or playing
+        self._drop_current = False
+        self._idle = threading.Condition(threading.RLock())  # Also guards _current and _drop_current
 
     def emit_waveform(self, waveform, gain=0.95):
         """
@@ -40,8 +58,7 @@ class BeamEmitterController:
             waveform_out = waveform_out / max_val
 
         print("[INFO] Emitting waveform to hardware...")
-        sd.play(waveform_out, samplerate=self.sample_rate, device=self.device)
-        sd.wait()
+        self.backend.play(waveform_out, self.sample_rate, self.device)
         print("[INFO] Beam emission complete.")
 
     def emit_loop(self, waveform, repetitions=3, delay=0.5):
@@ -51,7 +68,125 @@ class BeamEmitterController:
         for i in range(repetitions):
             print(f"[INFO] Emission cycle {i + 1} of {repetitions}")
             self.emit_waveform(waveform)
-            time.sleep(delay)
+            self.backend.pause(delay)
+
+    def prepare(self, waveform, gain=0.95):
+        """
+        Applies gain and clip protection once, returning a float32 buffer ready for enqueue().
+        """
+        if not isinstance(waveform, np.ndarray):
+            raise TypeError("Waveform must be a NumPy array")
+
+        buffer = np.multiply(waveform, gain, dtype=np.float32)
+        max_val = max(buffer.max(), -buffer.min()) if len(buffer) else 0
+        if max_val > 1.0:
+            buffer /= max_val
+        return buffer
+
+    def start_stream(self):
+        if self._stream is None:
+            self._stream = self.stream_factory(self.sample_rate, self.block_size, self.device, self._callback)
+            self._stream.start()
+
+    def stop_stream(self):
+        """
+        Closes the stream. Buffers still queued are discarded and drain() waiters are released.
+        """
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+        with self._idle:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._current = None
+            self._drop_current = False
+            self._pending = 0
+            self._idle.notify_all()
+
+    def enqueue(self, buffer, timeout=None):
+        """
+        Queues a prepared buffer for gapless playback right after the previous one.
+        Blocks while the queue is full, so the caller can prepare the next waveform meanwhile.
+        """
+        self.start_stream()
+        with self._idle:
+            self._pending += 1
+        try:
+            self._queue.put(buffer, timeout=timeout)
+        except queue.Full:
+            self._finish_buffer()
+            raise
+
+    def flush(self):
+        """
+        Discards all queued buffers and cuts the one currently playing.
+        """
+        with self._idle:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._finish_buffer()
+            self._drop_current = True
+
+    def drain(self, timeout=None):
+        """
+        Waits until every queued buffer has been played. Returns False on timeout.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def emit_stream(self, waveform, repetitions=1, gain=0.95):
+        """
+        Sample-accurate repeated emission through the persistent stream.
+        """
+        buffer = self.prepare(waveform, gain)
+        for _ in range(repetitions):
+            self.enqueue(buffer)
+        self.drain()
+
+    def _callback(self, outdata, frames, time_info, status):
+        out = outdata[:, 0]
+        filled = 0
+
+        # Held for the whole fill so a concurrent flush() lands either before or after this block
+        with self._idle:
+            if self._drop_current and self._current is not None:
+                self._current = None
+                self._finish_buffer()
+            self._drop_current = False
+
+            while filled < frames:
+                if self._current is None:
+                    try:
+                        self._current = self._queue.get_nowait()
+                        self._position = 0
+                    except queue.Empty:
+                        break
+
+                chunk = self._current[self._position:self._position + frames - filled]
+                out[filled:filled + len(chunk)] = chunk
+                filled += len(chunk)
+                self._position += len(chunk)
+
+                if self._position >= len(self._current):
+                    self._current = None
+                    self._finish_buffer()
+
+        out[filled:] = 0.0
+        outdata[:, 1:] = out[:, np.newaxis]
+
+    def _finish_buffer(self):
+        with self._idle:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
 
 
 if __name__ == "__main__":
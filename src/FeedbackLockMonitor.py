@@ -11,18 +11,35 @@ Otherwise, the transmission is terminated to prevent signal leakage.
 """
 
 import numpy as np
-import sounddevice as sd
-from scipy.fft import fft
+import threading
 import time
+from AudioBackend import SoundDeviceBackend
 
 
 class FeedbackLockMonitor:
-    def __init__(self, sample_rate=44100, duration=1.0, target_harmonics=(3, 6, 9), lock_threshold=0.3):
+    def __init__(self, sample_rate=44100, duration=1.0, target_harmonics=(3, 6, 9), lock_threshold=0.3,
+                 window_size=2048, hop_size=512, hold_hops=3, detector=None, backend=None, device=None,
+                 dtype=np.float64):
         self.sample_rate = sample_rate
         self.duration = duration
         self.target_harmonics = target_harmonics
         self.lock_threshold = lock_threshold  # Amplitude threshold to consider feedback valid
 
+        # Streaming mode: sliding analysis window, hop between analyses, consecutive hops required for lock
+        self.window_size = window_size
+        self.hop_size = hop_size
+        self.hold_hops = hold_hops
+
+        # Optional HarmonicDetector: reads only the target bins instead of a full FFT
+        self.detector = detector
+
+        # Audio input backend (see AudioBackend.py); defaults to sounddevice hardware input
+        self.backend = backend or SoundDeviceBackend()
+        self.device = device
+
+        # Capture and analysis precision (np.float32 halves capture memory and uses complex64 FFTs)
+        self.dtype = np.dtype(dtype)
+
     def listen_for_feedback(self, base_freq):
         """
         Listens to incoming field signal and performs spectral analysis
@@ -31,20 +48,145 @@ class FeedbackLockMonitor:
         print("[INFO] Listening for Tesla harmonic handshake...")
 
         try:
-            recording = sd.rec(int(self.sample_rate * self.duration),
-                               samplerate=self.sample_rate,
-                               channels=1,
-                               dtype='float64')
-            sd.wait()
+            recording = self.backend.record(int(self.sample_rate * self.duration),
+                                            self.sample_rate, self.device, dtype=self.dtype.name)
 
-            spectrum = np.abs(fft(recording[:, 0]))
-            freqs = np.fft.fftfreq(len(spectrum), 1.0 / self.sample_rate)
+            target_freqs = [base_freq * h for h in self.target_harmonics]
+            if self.detector is not None:
+                amplitudes = self.detector.amplitudes(recording[:, 0], target_freqs)
+            else:
+                # Nearest non-negative bin, as a lookup in the full fft/fftfreq spectrum would give
+                spectrum = np.abs(np.fft.rfft(recording[:, 0]))
+                n = len(recording)
+                bin_hz = self.sample_rate / n
+                bins = np.clip(np.rint(np.asarray(target_freqs) / bin_hz).astype(int), 0, len(spectrum) - 1)
+                amplitudes = spectrum[bins]
 
             lock_confirmed = True
-            for harmonic in self.target_harmonics:
-                target_freq = base_freq * harmonic
-                idx = np.argmin(np.abs(freqs - target_freq))
-                amplitude = spectrum[idx]
+            for harmonic, target_freq, amplitude in zip(self.target_harmonics, target_freqs, amplitudes):
 
                 print(f"  Detected amplitude at {harmonic}x ({int(target_freq)} Hz): {amplitude:.3f}")
                 if amplitude < self.lock_threshold:
+                    lock_confirmed = False
+
+            if lock_confirmed:
+                print("[LOCK] Harmonic handshake confirmed.")
+            else:
+                print("[DENIED] Harmonic handshake not detected.")
+            return lock_confirmed
+
+        except Exception as e:
+            print(f"[ERROR] Feedback listen failed: {e}")
+            return False
+
+    def listen_streaming(self, base_freq, timeout=None, source=None, stop=None):
+        """
+        Callback-driven handshake detection with early exit.
+        Analyzes a sliding window every hop_size samples and returns "locked" as soon as
+        all target harmonics stay above lock_threshold for hold_hops consecutive hops,
+        or "timeout" once timeout seconds (default: duration) of input have passed.
+
+        source: optional NumPy array fed through the same callback instead of a sound card.
+                Non-realtime backends are captured up front and fed the same way, so the
+                timeout counts samples rather than wall-clock time.
+        stop: optional threading.Event; setting it ends the listen within one hop and
+              returns "stopped".
+        """
+        timeout = self.duration if timeout is None else timeout
+        detector = _SlidingLockDetector(self, base_freq)
+
+        if source is None and not self.backend.realtime:
+            source = self.backend.record(int(self.sample_rate * timeout), self.sample_rate, self.device,
+                                         dtype=self.dtype.name)[:, 0]
+
+        if source is not None:
+            source = np.asarray(source)
+            max_samples = min(len(source), int(self.sample_rate * timeout))
+            for start in range(0, max_samples, self.hop_size):
+                block = source[start:min(start + self.hop_size, max_samples)]
+                if stop is not None and stop.is_set():
+                    return "stopped"
+                detector.callback(block.reshape(len(block), -1), len(block), None, None)
+                if detector.locked.is_set():
+                    return "locked"
+            return "timeout"
+
+        print("[INFO] Streaming listen for Tesla harmonic handshake...")
+        with self.backend.input_stream(self.sample_rate, self.hop_size, self.device, detector.callback,
+                                       dtype=self.dtype.name):
+            if stop is None:
+                locked = detector.locked.wait(timeout)
+            else:
+                # Wake once per hop to notice stop
+                deadline = time.monotonic() + timeout
+                hop_seconds = self.hop_size / self.sample_rate
+                locked = False
+                while not locked and not stop.is_set():
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    locked = detector.locked.wait(min(hop_seconds, remaining))
+                if not locked and stop.is_set():
+                    return "stopped"
+
+        return "locked" if locked else "timeout"
+
+
+class _SlidingLockDetector:
+    """
+    Sliding-window harmonic detector fed from an input-stream callback.
+    """
+
+    def __init__(self, monitor, base_freq):
+        if monitor.hop_size > monitor.window_size:
+            raise ValueError(f"hop_size ({monitor.hop_size}) must not exceed window_size ({monitor.window_size})")
+        self.window_size = monitor.window_size
+        self.hop_size = monitor.hop_size
+        self.hold_hops = monitor.hold_hops
+        self.lock_threshold = monitor.lock_threshold
+
+        self.detector = monitor.detector
+        self.target_freqs = [base_freq * h for h in monitor.target_harmonics]
+        bin_hz = monitor.sample_rate / self.window_size
+        # Harmonics above Nyquist read the last bin, as listen_for_feedback does
+        self.bins = [min(int(round(f / bin_hz)), self.window_size // 2) for f in self.target_freqs]
+
+        self.buffer = np.zeros(self.window_size, dtype=monitor.dtype)
+        self.buffered = 0  # Samples received so far, capped at window_size
+        self.pending = 0   # Samples received since the last analysis
+        self.hits = 0      # Consecutive hops with all harmonics above threshold
+        self.locked = threading.Event()
+
+    def callback(self, indata, frames, time_info, status):
+        samples = indata[:, 0]
+        while len(samples) and not self.locked.is_set():
+            take = min(len(samples), self.hop_size - self.pending)
+            self.buffer[:-take] = self.buffer[take:]
+            self.buffer[-take:] = samples[:take]
+            samples = samples[take:]
+
+            self.buffered = min(self.buffered + take, self.window_size)
+            self.pending += take
+            if self.pending == self.hop_size:
+                self.pending = 0
+                if self.buffered == self.window_size:
+                    self._analyze()
+
+    def _analyze(self):
+        if self.detector is not None:
+            amplitudes = self.detector.amplitudes(self.buffer, self.target_freqs)
+        else:
+            amplitudes = np.abs(np.fft.rfft(self.buffer))[self.bins]
+
+        if np.all(amplitudes >= self.lock_threshold):
+            self.hits += 1
+            if self.hits >= self.hold_hops:
+                self.locked.set()
+        else:
+            self.hits = 0
+
+
+if __name__ == "__main__":
+    monitor = FeedbackLockMonitor()
+    result = monitor.listen_streaming(base_freq=111, timeout=2.0)
+    print(f"[RESULT] Handshake {result}")
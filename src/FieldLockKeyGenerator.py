@@ -14,13 +14,23 @@ Supports secure handshakes in high-noise or adversarial environments.
 
 import numpy as np
 import hashlib
+import hmac
 import time
+from functools import lru_cache
 
 class FieldLockKeyGenerator:
-    def __init__(self, entropy_salt="IX-Futakuchi-onna", time_window=1.0):
+    def __init__(self, entropy_salt="IX-Futakuchi-onna", time_window=1.0, cache_size=64):
         self.entropy_salt = entropy_salt
         self.time_window = time_window  # seconds per cycle window
 
+        # Per-instance LRU of keys by aligned window index
+        self._window_key = lru_cache(maxsize=cache_size)(self._compute_window_key)
+
+        # Accepted keys for the current window +/- skew, rolled forward as windows advance
+        self._accepted_window = None
+        self._accepted_skew = None
+        self._accepted_keys = ()
+
     def _harmonic_seed(self, t):
         """
         Generates harmonic pattern seed using Tesla’s 3-6-9 additive rule.
@@ -35,11 +45,35 @@ class FieldLockKeyGenerator:
         base = f"{harmonic_seed}-{self.entropy_salt}"
         return hashlib.sha256(base.encode()).hexdigest()
 
+    def _compute_window_key(self, window_index):
+        aligned_time = window_index * self.time_window
+        return self._hash_key(self._harmonic_seed(aligned_time))
+
+    def _current_window(self):
+        return int(time.time() // self.time_window)
+
     def generate_key(self):
-        current_time = time.time()
-        aligned_time = int(current_time // self.time_window) * self.time_window
-        harmonic = self._harmonic_seed(aligned_time)
-        return self._hash_key(harmonic)
+        return self._window_key(self._current_window())
+
+    def verify_key(self, test_key, skew_windows=0):
+        """
+        Accepts keys from the current window or up to skew_windows windows either side.
+        Keys come from a precomputed set refreshed only when the window advances;
+        every candidate is compared in constant time.
+        """
+        if not isinstance(test_key, (str, bytes)):
+            return False
+
+        window = self._current_window()
+        if window != self._accepted_window or skew_windows != self._accepted_skew:
+            self._accepted_keys = tuple(
+                self._window_key(w).encode() for w in range(window - skew_windows, window + skew_windows + 1)
+            )
+            self._accepted_window = window
+            self._accepted_skew = skew_windows
 
-    def verify_key(self, test_key):
-        return test_key == self.generate_key()
+        candidate = test_key.encode() if isinstance(test_key, str) else test_key
+        match = False
+        for key in self._accepted_keys:
+            match |= hmac.compare_digest(candidate, key)
+        return match
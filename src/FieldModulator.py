@@ -10,13 +10,18 @@ Outputs amplitude-modulated waveforms for directional beam transmission hardware
 """
 
 import numpy as np
+from OscillatorBank import OscillatorBank
 
 
 class FieldModulator:
-    def __init__(self, base_freq=111, sample_rate=44100, duration=1.0):
+    def __init__(self, base_freq=111, sample_rate=44100, duration=1.0, dtype=np.float64):
+        """
+        dtype: default output precision for every render method (e.g. np.float32)
+        """
         self.base_freq = base_freq  # Estimated from HarmonicEncoder
         self.sample_rate = sample_rate
         self.duration = duration
+        self.dtype = np.dtype(dtype)
 
     def modulate(self, harmonic_vector):
         """
@@ -27,21 +32,94 @@ class FieldModulator:
         Output:
             waveform (np.ndarray): Composite waveform ready for beam driver
         """
-        t = np.linspace(0, self.duration, int(self.sample_rate * self.duration), endpoint=False)
-        waveform = np.zeros_like(t)
+        return self.synthesize(harmonic_vector)
+
+    def synthesize(self, harmonic_vector, out=None, dtype=None):
+        """
+        Renders all harmonics in one pass through an oscillator bank.
+
+        Input:
+            harmonic_vector (dict): {3: amp1, 6: amp2, 9: amp3}
+            out (np.ndarray): optional 1D buffer of duration * sample_rate samples to render into
+            dtype: output dtype when out is not given (default: self.dtype)
+        Output:
+            waveform (np.ndarray): Composite waveform normalized to a peak of 1.0
+        """
+        return self._render_normalized(self._bank(harmonic_vector), out, dtype)
+
+    def modulate_frequencies(self, encrypted_vector, out=None, dtype=None):
+        """
+        Renders directly from an encrypted frequency list, with no decrypt round trip.
 
-        for harmonic, amplitude in harmonic_vector.items():
-            freq = self.base_freq * harmonic
-            phase_shift = np.pi * (harmonic % 3)  # subtle variation: 0, pi, pi
-            waveform += amplitude * np.sin(2 * np.pi * freq * t + phase_shift)
+        Input:
+            encrypted_vector: [(freq, amp), ...] as returned by HarmonicEncryptor.encrypt,
+                              or a structured array with 'freq' and 'amp' fields
+        Output:
+            waveform (np.ndarray): Composite waveform normalized to a peak of 1.0
+        """
+        return self._render_normalized(self._frequency_bank(encrypted_vector), out, dtype)
+
+    def _render_normalized(self, bank, out, dtype):
+        waveform = bank.render(int(self.sample_rate * self.duration), out=out, dtype=dtype or self.dtype)
 
         # Normalize to prevent clipping
-        max_val = np.max(np.abs(waveform))
+        max_val = max(waveform.max(), -waveform.min()) if len(waveform) else 0
         if max_val > 0:
-            waveform = waveform / max_val
+            waveform /= max_val
 
         return waveform
 
+    def stream(self, harmonic_vector, block_size=4096, num_blocks=None, dtype=None):
+        """
+        Yields fixed-size waveform blocks forever (or for num_blocks) with phase continuity
+        across blocks. Normalization uses the analytic peak bound (sum of |amplitudes|)
+        instead of scanning a rendered buffer, so every block shares the same scale.
+        """
+        return self._stream_blocks(self._bank(harmonic_vector), block_size, num_blocks, dtype)
+
+    def _stream_blocks(self, bank, block_size, num_blocks, dtype):
+        scale = self._stream_scale(bank)
+        emitted = 0
+        while num_blocks is None or emitted < num_blocks:
+            block = bank.render(block_size, dtype=dtype or self.dtype)
+            block *= scale
+            yield block
+            emitted += 1
+
+    def stream_callback(self, harmonic_vector):
+        """
+        Returns a sounddevice-style output callback (outdata, frames, time, status)
+        that renders the harmonic vector continuously into the output stream.
+        """
+        bank = self._bank(harmonic_vector)
+        scale = self._stream_scale(bank)
+
+        def callback(outdata, frames, time_info, status):
+            channel = outdata[:, 0]
+            bank.render(frames, out=channel)
+            channel *= scale
+            outdata[:, 1:] = channel[:, np.newaxis]
+
+        return callback
+
+    def _stream_scale(self, bank):
+        peak = bank.peak_bound()
+        return 1.0 / peak if peak > 0 else 0.0
+
+    def _frequency_bank(self, encrypted_vector):
+        if isinstance(encrypted_vector, np.ndarray) and encrypted_vector.dtype.names:
+            freqs, amps = encrypted_vector['freq'], encrypted_vector['amp']
+        else:
+            freqs = [freq for freq, _ in encrypted_vector]
+            amps = [amp for _, amp in encrypted_vector]
+        return OscillatorBank(freqs, amps, sample_rate=self.sample_rate)
+
+    def _bank(self, harmonic_vector):
+        harmonics = list(harmonic_vector.keys())
+        freqs = [self.base_freq * h for h in harmonics]
+        phases = [np.pi * (h % 3) for h in harmonics]  # subtle variation: 0, pi, pi
+        return OscillatorBank(freqs, list(harmonic_vector.values()), phases, sample_rate=self.sample_rate)
+
 
 if __name__ == "__main__":
     # Example usage with test harmonic data
@@ -8,9 +8,27 @@ Description:
 Interfaces with the field resonance sensor hardware described in FieldResonanceSensor.md.
 Reads GPIO or ADC input and confirms Tesla-harmonic presence (3x, 6x, 9x).
 Used as the software decoder that grants or denies secure transmission continuation.
+
+GPIO lock can be awaited through edge events (debounced, with edge-to-callback latency recorded)
+instead of polling.
+
+ADC capture runs in burst mode: a background thread reads bursts of conversions into a
+preallocated ring buffer, and consumers pull timestamped blocks for spectral validation.
+The MCP3008 converts once per chip-select assertion, so every conversion is its own SPI
+transfer. On a spidev device the whole burst is still submitted in a few SPI_IOC_MESSAGE
+ioctls (one 3-byte transfer per conversion, cs_change between them); other SpiDev-compatible
+objects get one xfer2 call per conversion.
 """
 
+import asyncio
+import sys
+import threading
 import time
+from collections import deque
+
+import numpy as np
+
+from HarmonicDetector import HarmonicDetector
 
 try:
     import RPi.GPIO as GPIO  # Raspberry Pi
@@ -20,49 +38,398 @@ except ImportError:
     HAS_HARDWARE = False
 
 
+MCP3008_FRAME_BITS = 24  # One conversion = 3 SPI bytes
+MCP3008_MAX_SPEED_HZ = 1350000  # Datasheet limit at 2.7 V
+
+# struct spi_ioc_transfer from <linux/spi/spidev.h>
+SPI_IOC_TRANSFER = np.dtype([
+    ("tx_buf", "<u8"), ("rx_buf", "<u8"), ("len", "<u4"), ("speed_hz", "<u4"),
+    ("delay_usecs", "<u2"), ("bits_per_word", "u1"), ("cs_change", "u1"),
+    ("tx_nbits", "u1"), ("rx_nbits", "u1"), ("word_delay_usecs", "u1"), ("pad", "u1"),
+])
+SPI_IOC_MAX_TRANSFERS = (1 << 14) // SPI_IOC_TRANSFER.itemsize - 1  # ioctl size field is 14 bits
+
+
+def _spi_ioc_message(count):
+    # _IOW(SPI_IOC_MAGIC, 0, char[SPI_MSGSIZE(count)])
+    return (1 << 30) | ((count * SPI_IOC_TRANSFER.itemsize) << 16) | (ord("k") << 8)
+
+
 class FieldResonanceDecoder:
-    def __init__(self, gpio_pin=17, adc_channel=None, adc_vref=3.3):
+    def __init__(self, gpio_pin=17, adc_channel=None, adc_vref=3.3, spi=None,
+                 sample_rate=44100, base_freq=111, burst_size=256, ring_size=1 << 18,
+                 snr_threshold=10.0, gpio=None, debounce_ms=5, latency_window=10000):
+        """
+        spi: SpiDev-compatible object (e.g. SimulatedSPI.SimulatedSpiDev); defaults to spidev on hardware
+        gpio: RPi.GPIO-compatible module (e.g. SimulatedGPIO.SimulatedGPIO()); defaults to RPi.GPIO on hardware
+        debounce_ms: edges within this long of the last accepted edge are ignored
+        latency_window: number of recent edge-to-callback latencies kept for latency_histogram
+        sample_rate: ADC conversion rate; also the rate assumed by validate_with_signal
+        burst_size: conversions per acquisition burst (each conversion is its own chip-select cycle)
+        ring_size: acquisition ring buffer capacity in samples (rounded up to whole bursts)
+        snr_threshold: minimum ratio of each harmonic to the off-harmonic noise floor for a lock
+        """
         self.gpio_pin = gpio_pin
         self.adc_channel = adc_channel
         self.adc_vref = adc_vref
+        self.sample_rate = sample_rate
+        self.base_freq = base_freq
+        self.burst_size = burst_size
+        self.snr_threshold = snr_threshold
+        self.harmonics = (3, 6, 9)
+        self.detector = HarmonicDetector(sample_rate=sample_rate)
+        self.spi = spi
+        self.gpio = gpio if gpio is not None else (GPIO if HAS_HARDWARE else None)
 
-        if HAS_HARDWARE:
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setup(self.gpio_pin, GPIO.IN)
+        if self.gpio is not None:
+            self.gpio.setmode(self.gpio.BCM)
+            self.gpio.setup(self.gpio_pin, self.gpio.IN)
 
-            if self.adc_channel is not None:
+        if HAS_HARDWARE:
+            if self.adc_channel is not None and self.spi is None:
                 self.spi = spidev.SpiDev()
                 self.spi.open(0, 0)
-                self.spi.max_speed_hz = 1350000
+
+        if self.spi is not None:
+            # A 24-bit frame per sample period at sample_rate, capped at the datasheet limit. This bounds
+            # the conversion rate from above; CS gaps and transfer overhead make the actual rate lower,
+            # which is why every burst records its own start/end time.
+            self.spi.max_speed_hz = min(sample_rate * MCP3008_FRAME_BITS, MCP3008_MAX_SPEED_HZ)
+        self._ioctl_plan = None  # (num_samples, tx, rx, transfer tables) for the spidev ioctl path
+
+        # Ring buffer: samples plus (start, end) perf_counter times of the burst that filled each slot
+        num_bursts = -(-ring_size // burst_size)
+        self._ring = np.zeros(num_bursts * burst_size)
+        self._burst_times = np.zeros((num_bursts, 2))
+        self._written = 0  # Total samples acquired
+        self._read_pos = 0  # Next sample index for read_block
+        self.overruns = 0  # Times read_block fell a full ring behind and skipped ahead
+        self._ready = threading.Condition()
+        self._running = threading.Event()
+        self._thread = None
+
+        # Edge-event lock state
+        self.debounce_ms = debounce_ms
+        self.edge_latencies = deque(maxlen=latency_window)  # Seconds from edge to state update
+        self._edge_events = False
+        self._locked = False
+        self._last_edge = None
+        self._async_waiters = []
+        self._lock_state = threading.Condition()
 
     def read_gpio_lock(self):
         """
         Reads simple GPIO pin for HIGH/LOW lock indication from hardware sensor.
         """
-        if not HAS_HARDWARE:
+        if self.gpio is None:
             print("[MOCK] Simulating GPIO lock: returning True")
             return True  # Simulated pass
 
-        state = GPIO.input(self.gpio_pin)
+        state = self.gpio.input(self.gpio_pin)
         print(f"[GPIO] Field lock state: {state}")
-        return state == GPIO.HIGH
+        return state == self.gpio.HIGH
+
+    def enable_edge_events(self):
+        """
+        Switches lock detection to GPIO edge events on both edges.
+        """
+        if self._edge_events or self.gpio is None:
+            return
+        with self._lock_state:
+            self._locked = self.gpio.input(self.gpio_pin) == self.gpio.HIGH
+            self._last_edge = None
+        # RPi.GPIO requires an int bouncetime, so the keyword is left out entirely when debounce is off
+        options = {"bouncetime": int(self.debounce_ms)} if self.debounce_ms >= 1 else {}
+        self.gpio.add_event_detect(self.gpio_pin, self.gpio.BOTH, callback=self._on_edge, **options)
+        self._edge_events = True
+
+    def disable_edge_events(self):
+        if self._edge_events:
+            self.gpio.remove_event_detect(self.gpio_pin)
+            self._edge_events = False
+
+    def _on_edge(self, channel):
+        entered = time.perf_counter()
+        # Sources that report when the edge happened give true edge-to-callback latency;
+        # otherwise latency is measured from callback entry.
+        event_time = getattr(self.gpio, "event_time", None)
+        edge_time = (event_time(channel) if event_time is not None else None) or entered
+
+        with self._lock_state:
+            if self._last_edge is not None and edge_time - self._last_edge < self.debounce_ms / 1000.0:
+                return
+            self._last_edge = edge_time
+
+        # Edges suppressed during the debounce window are invisible, so re-read the level once it has settled
+        if self.debounce_ms > 0:
+            settle = threading.Timer(self.debounce_ms / 1000.0, self._apply_level, args=(None,))
+            settle.daemon = True
+            settle.start()
+        self._apply_level(edge_time)
+
+    def _apply_level(self, edge_time):
+        """
+        Updates lock state from the current pin level; a bounce that ends where it started is a no-op.
+        """
+        with self._lock_state:
+            locked = self.gpio.input(self.gpio_pin) == self.gpio.HIGH
+            if locked == self._locked:
+                return
+            self._locked = locked
+            self._lock_state.notify_all()
+            waiters, self._async_waiters = (self._async_waiters, []) if locked else ([], self._async_waiters)
+            if edge_time is not None:
+                self.edge_latencies.append(time.perf_counter() - edge_time)
+
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def wait_for_lock(self, timeout=None):
+        """
+        Blocks until the lock pin is HIGH (enabling edge events if needed).
+        Returns True on lock, False on timeout.
+        """
+        if self.gpio is None:
+            return self.read_gpio_lock()
+        self.enable_edge_events()
+        with self._lock_state:
+            return self._lock_state.wait_for(lambda: self._locked, timeout)
+
+    async def wait_for_lock_async(self, timeout=None):
+        """
+        Awaitable wait_for_lock: resolves from the GPIO callback without blocking the event loop.
+        """
+        if self.gpio is None:
+            return self.read_gpio_lock()
+        self.enable_edge_events()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        entry = (loop, future)
+        with self._lock_state:
+            if self._locked:
+                return True
+            self._async_waiters.append(entry)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock_state:
+                if entry in self._async_waiters:
+                    self._async_waiters.remove(entry)
+
+    def latency_histogram(self, bins=None):
+        """
+        Histogram of recorded edge-to-callback latencies in seconds.
+        Default bins are log-spaced from 1 us to 1 s. Returns (counts, bin_edges) as np.histogram does.
+        """
+        bins = np.logspace(-6, 0, 25) if bins is None else bins
+        with self._lock_state:
+            latencies = np.array(self.edge_latencies)
+        return np.histogram(latencies, bins=bins)
 
     def read_adc_voltage(self):
         """
         Optional: reads voltage level from ADC (MCP3008) on specified channel.
         """
-        if not HAS_HARDWARE or self.adc_channel is None:
+        if self.spi is None or self.adc_channel is None:
             return 0.0
 
-        adc = self.spi.xfer2([1, (8 + self.adc_channel) << 4, 0])
-        data = ((adc[1] & 3) << 8) + adc[2]
-        voltage = (data * self.adc_vref) / 1023.0
-        print(f"[ADC] Voltage reading: {voltage:.2f} V")
-        return voltage
+        return float(self.read_adc_burst(1)[0])
+
+    def read_adc_burst(self, num_samples):
+        """
+        Reads num_samples back-to-back conversions. Returns volts as a float64 array.
+        """
+        if self.spi is None or self.adc_channel is None:
+            raise RuntimeError("No ADC configured (set adc_channel and provide spi or hardware)")
+
+        adc = self._convert(num_samples)
+        data = ((adc[:, 1] & 3) << 8) | adc[:, 2]
+        return data * (self.adc_vref / 1023.0)
+
+    def _command_frame(self):
+        return [1, (8 + self.adc_channel) << 4, 0]
+
+    def _convert(self, num_samples):
+        """
+        Runs num_samples conversions with chip-select released between them.
+        Returns the (num_samples, 3) response bytes as int64.
+        """
+        fileno = getattr(self.spi, "fileno", None)
+        if fileno is not None and sys.platform.startswith("linux"):
+            try:
+                return self._convert_ioctl(fileno(), num_samples)
+            except (OSError, ValueError):
+                pass  # Not a spidev character device: fall back to one xfer2 per conversion
+
+        frame = self._command_frame()
+        return np.array([self.spi.xfer2(frame) for _ in range(num_samples)], dtype=np.int64)
+
+    def _convert_ioctl(self, fd, num_samples):
+        """
+        spidev fast path: one 3-byte spi_ioc_transfer per conversion with cs_change set, submitted
+        SPI_IOC_MAX_TRANSFERS at a time (also keeping each message well under spidev's 4096-byte bufsiz).
+        """
+        import fcntl
+
+        if self._ioctl_plan is None or self._ioctl_plan[0] != num_samples:
+            tx = np.tile(np.array(self._command_frame(), dtype=np.uint8), (num_samples, 1))
+            rx = np.zeros_like(tx)
+            tables = []
+            for start in range(0, num_samples, SPI_IOC_MAX_TRANSFERS):
+                rows = np.arange(start, min(start + SPI_IOC_MAX_TRANSFERS, num_samples))
+                table = np.zeros(len(rows), dtype=SPI_IOC_TRANSFER)
+                table["tx_buf"] = tx.ctypes.data + 3 * rows
+                table["rx_buf"] = rx.ctypes.data + 3 * rows
+                table["len"] = 3
+                table["speed_hz"] = self.spi.max_speed_hz
+                table["bits_per_word"] = 8
+                table["cs_change"][:-1] = 1  # Deassert CS after each conversion (the last ends the message)
+                tables.append(table)
+            self._ioctl_plan = (num_samples, tx, rx, tables)
+
+        _, _, rx, tables = self._ioctl_plan
+        for table in tables:
+            fcntl.ioctl(fd, _spi_ioc_message(len(table)), table)
+        return rx.astype(np.int64)
+
+    def start_acquisition(self):
+        """
+        Starts the background burst acquisition thread filling the ring buffer.
+        """
+        if self._thread is not None:
+            return
+        if self.spi is None or self.adc_channel is None:
+            raise RuntimeError("No ADC configured (set adc_channel and provide spi or hardware)")
+
+        with self._ready:
+            self._written = self._read_pos = 0
+        self._running.set()
+        self._thread = threading.Thread(target=self._acquire, daemon=True)
+        self._thread.start()
+
+    def stop_acquisition(self):
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _acquire(self):
+        num_bursts = len(self._burst_times)
+
+        while self._running.is_set():
+            start = time.perf_counter()
+            adc = self._convert(self.burst_size)
+            end = time.perf_counter()
+
+            with self._ready:
+                burst = (self._written // self.burst_size) % num_bursts
+                offset = burst * self.burst_size
+                ring = self._ring[offset:offset + self.burst_size]
+                np.bitwise_or((adc[:, 1] & 3) << 8, adc[:, 2], out=adc[:, 0])
+                np.multiply(adc[:, 0], self.adc_vref / 1023.0, out=ring)
+                self._burst_times[burst] = start, end
+                self._written += self.burst_size
+                self._ready.notify_all()
+
+    def read_block(self, num_samples, timeout=None):
+        """
+        Returns (timestamp, volts) for the next num_samples acquired samples, in order.
+        timestamp is the estimated perf_counter time of the first sample.
+        If the reader fell more than a ring behind, skips to the oldest retained sample.
+        Returns None if the samples are not available within timeout seconds.
+        """
+        if num_samples > len(self._ring):
+            raise ValueError(f"Block of {num_samples} exceeds ring capacity {len(self._ring)}")
+
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._written - self._read_pos >= num_samples, timeout):
+                return None
+            if self._written - self._read_pos > len(self._ring):
+                self._read_pos = self._written - len(self._ring)
+                self.overruns += 1
+            start = self._read_pos
+            self._read_pos += num_samples
+            return self._copy_out(start, num_samples)
+
+    def latest_block(self, num_samples):
+        """
+        Returns (timestamp, volts) for the most recent num_samples samples without consuming them,
+        or None if fewer have been acquired.
+        """
+        with self._ready:
+            if self._written < num_samples:
+                return None
+            return self._copy_out(self._written - num_samples, num_samples)
+
+    def _copy_out(self, start, num_samples):
+        # Caller holds self._ready
+        size = len(self._ring)
+        head = start % size
+        first = min(num_samples, size - head)
+        block = np.empty(num_samples)
+        block[:first] = self._ring[head:head + first]
+        block[first:] = self._ring[:num_samples - first]
+
+        burst, index = divmod(head, self.burst_size)
+        burst_start, burst_end = self._burst_times[burst]
+        timestamp = burst_start + (burst_end - burst_start) * index / self.burst_size
+        return timestamp, block
+
+    def validate_with_signal(self, signal, base_freq=None, sample_rate=None):
+        """
+        Checks a return signal for the Tesla 3x/6x/9x harmonics.
+        Each harmonic magnitude must exceed snr_threshold times the noise floor, estimated as the
+        median magnitude at frequencies halfway between harmonics of the fundamental.
+        Pure noise or a partial harmonic set therefore fails.
+
+        Input:
+            signal (np.ndarray): 1D block, or a batch of blocks shaped (num_blocks, N)
+        Output:
+            bool for a single block, boolean array of shape (num_blocks,) for a batch
+        """
+        signal = np.asarray(signal, dtype=np.float64)
+        base_freq = self.base_freq if base_freq is None else base_freq
+        detector = self.detector
+        if sample_rate is not None and sample_rate != detector.sample_rate:
+            detector = HarmonicDetector(sample_rate=sample_rate)
+
+        n = signal.shape[-1]
+        nyquist = detector.sample_rate / 2
+        probes = base_freq * (np.arange(1, 2 * max(self.harmonics) + 1) + 0.5)
+        probes = probes[probes < nyquist]
+        freqs = np.concatenate([base_freq * np.array(self.harmonics), probes])
+
+        centered = signal - signal.mean(axis=-1, keepdims=True)  # Strip the ADC bias
+        amps = detector.amplitudes(centered, freqs, window=np.hanning(n))
+        harmonic = amps[..., :len(self.harmonics)]
+        floor = np.median(amps[..., len(self.harmonics):], axis=-1, keepdims=True)
+
+        locked = np.all(harmonic > self.snr_threshold * np.maximum(floor, np.finfo(float).tiny), axis=-1)
+        return bool(locked) if locked.ndim == 0 else locked
+
+    def validate_acquisition(self, num_samples=8192, timeout=None):
+        """
+        Pulls the next acquired block and validates it. Returns (timestamp, locked) or None on timeout.
+        """
+        block = self.read_block(num_samples, timeout)
+        if block is None:
+            return None
+        timestamp, volts = block
+        return timestamp, self.validate_with_signal(volts)
 
     def cleanup(self):
-        if HAS_HARDWARE:
-            GPIO.cleanup()
+        self.stop_acquisition()
+        self.disable_edge_events()
+        if self.gpio is not None:
+            self.gpio.cleanup()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
 
 
 if __name__ == "__main__":
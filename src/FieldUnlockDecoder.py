@@ -15,40 +15,222 @@ Performs:
 Use this on received field returns before downstream analysis or lock validation.
 """
 
+import os
+import time
 import numpy as np
+from SignalObfuscator_v2 import SignalObfuscatorV2, _map_row_chunks
 
 class FieldUnlockDecoder:
-    def __init__(self, known_seed=None):
-        if known_seed is not None:
-            np.random.seed(known_seed)
+    def __init__(self, known_seed=None, smear_strength=0.03, block_size=1024, dtype=np.float64):
+        """
+        known_seed: key shared with the SignalObfuscatorV2 instance that produced the signal.
+        Each decode() starts from a fresh generator on that key (reset-per-message), so decoders
+        hold no shared global state and can run concurrently.
+        dtype: decode precision (np.float32 decodes with complex64 FFTs)
+        """
+        self.seed = known_seed
+        self.smear_strength = smear_strength
+        self.block_size = block_size
+        self.dtype = np.dtype(dtype)
+        self.reset()
+
+    def reset(self):
+        """
+        Rewinds the instance generator used by standalone desmear/descramble calls.
+        """
+        self.rng = np.random.default_rng(self.seed)
 
-    def _desmear_spectrum(self, signal, smear_strength=0.03):
+    def _desmear_spectrum(self, signal, smear_strength=None, rng=None):
         """
         Applies inverse smear logic — assumes known smear parameters.
+        Mirrors the real-input FFT smear of SignalObfuscatorV2.
         """
-        fft = np.fft.fft(signal)
-        spectrum = np.abs(fft)
-        phase = np.angle(fft)
+        rng = rng or self.rng
+        smear_strength = self.smear_strength if smear_strength is None else smear_strength
 
-        smear = np.random.normal(1.0, smear_strength, size=spectrum.shape)
-        corrected_fft = (spectrum / smear) * np.exp(1j * phase)
-        return np.real(np.fft.ifft(corrected_fft))
+        spectrum = np.fft.rfft(signal)
+        smear = rng.normal(1.0, smear_strength, size=spectrum.shape).astype(spectrum.real.dtype)
+        return np.fft.irfft(spectrum / smear, n=len(signal))
 
-    def _descramble_phase(self, signal, block_size=1024):
+    def _descramble_phase(self, signal, block_size=None, rng=None):
         """
         Applies reverse phase alignment assuming known uniform shifts.
+        The trailing partial block is passed through, as on the obfuscator side.
         """
-        num_blocks = len(signal) // block_size
-        restored = np.zeros_like(signal)
+        rng = rng or self.rng
+        block_size = block_size or self.block_size
 
-        for i in range(num_blocks):
-            block = signal[i * block_size:(i + 1) * block_size]
-            phase_shift = np.random.uniform(-np.pi, np.pi)
-            restored[i * block_size:(i + 1) * block_size] = block / np.cos(phase_shift)
-        return restored
+        num_blocks = len(signal) // block_size
+        shifts = rng.uniform(-np.pi, np.pi, size=num_blocks)
+        return SignalObfuscatorV2._scale_blocks(signal, (1.0 / np.cos(shifts)).astype(signal.dtype), block_size)
 
     def decode(self, signal):
-        desmeared = self._desmear_spectrum(signal)
-        restored = self._descramble_phase(desmeared)
+        rng = np.random.default_rng(self.seed)  # Reset per message
+        signal = np.asarray(signal, dtype=self.dtype)
+        desmeared = self._desmear_spectrum(signal, rng=rng)
+        restored = self._descramble_phase(desmeared, rng=rng)
         normalized = restored / np.max(np.abs(restored))
         return normalized
+
+    def decode_many(self, signals, workers=None):
+        """
+        Decodes a 2D array (messages x samples) with the key stream drawn once and
+        row chunks spread across a thread pool.
+        """
+        signals = np.asarray(signals, dtype=self.dtype)
+        n = signals.shape[1]
+
+        rng = np.random.default_rng(self.seed)
+        smear = rng.normal(1.0, self.smear_strength, size=n // 2 + 1).astype(self.dtype)
+        shifts = rng.uniform(-np.pi, np.pi, size=n // self.block_size)
+        gains = (1.0 / np.cos(shifts)).astype(self.dtype)
+
+        def run(chunk):
+            desmeared = np.fft.irfft(np.fft.rfft(chunk, axis=1) / smear, n=n, axis=1)
+            restored = SignalObfuscatorV2._scale_blocks(desmeared, gains, self.block_size)
+            return restored / np.max(np.abs(restored), axis=1, keepdims=True)
+
+        return _map_row_chunks(run, signals, workers)
+
+    def decode_archive(self, source, output_dir=None, workers=None):
+        """
+        Decodes an archive of captured returns across a process pool.
+
+        source: directory of .wav captures, path to a stacked (captures x samples) .npy file,
+                or a 2D array. Directories and .npy files are opened by the workers themselves
+                (WAV reads / memory-mapped rows), so the archive is never loaded into this process.
+        output_dir: where decoded results are written — one .wav per capture for directories,
+                    a single decoded.npy for stacked input. Defaults to <source dir>/decoded.
+                    For an in-memory array without output_dir, decoded rows are returned in the records.
+        Returns:
+            list of dicts with item, ok, seconds, error and output per capture
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        tasks = self._archive_tasks(source, output_dir)
+        workers = workers or os.cpu_count() or 1
+
+        # Each worker call takes a run of items, so stacked sources and decoded.npy are opened once per run
+        run = max(1, len(tasks) // (workers * 4))
+        runs = [tasks[i:i + run] for i in range(0, len(tasks), run)]
+
+        print(f"[INFO] Decoding {len(tasks)} captures on {workers} worker(s)...")
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_archive_worker,
+                                 initargs=(self.seed, self.smear_strength, self.block_size, self.dtype)) as pool:
+            records = [record for chunk in pool.map(_decode_archive_run, runs) for record in chunk]
+
+        failures = sum(1 for r in records if not r["ok"])
+        print(f"[INFO] Archive decode complete: {len(records) - failures} ok, {failures} failed.")
+        return records
+
+    def _archive_tasks(self, source, output_dir):
+        if isinstance(source, np.ndarray):
+            if isinstance(source, np.memmap) and source.filename is not None:
+                # A sliced memmap keeps its parent's .offset, so locate the view inside the root mapping
+                root = source
+                while isinstance(root.base, np.memmap):
+                    root = root.base
+                ref = ("memmap", source.filename, root.offset, root.dtype.str, root.shape,
+                       source.ctypes.data - root.ctypes.data, source.dtype.str, source.shape, source.strides)
+                output_path = self._archive_output(os.path.dirname(source.filename), output_dir, source.shape)
+                return [("mmap", ref, i, output_path) for i in range(source.shape[0])]
+
+            output_path = self._archive_output(None, output_dir, source.shape) if output_dir else None
+            return [("array", row, i, output_path) for i, row in enumerate(source)]
+
+        if os.path.isdir(source):
+            output_dir = output_dir or os.path.join(source, "decoded")
+            os.makedirs(output_dir, exist_ok=True)
+            names = sorted(f for f in os.listdir(source) if f.lower().endswith(".wav"))
+            return [("wav", os.path.join(source, name), name, os.path.join(output_dir, name)) for name in names]
+
+        stacked = np.load(source, mmap_mode='r')
+        output_path = self._archive_output(os.path.dirname(source), output_dir, stacked.shape)
+        return [("mmap", ("npy", source), i, output_path) for i in range(stacked.shape[0])]
+
+    def _archive_output(self, source_dir, output_dir, shape):
+        """
+        Pre-allocates decoded.npy so workers can write their rows in place.
+        """
+        output_dir = output_dir or os.path.join(source_dir or ".", "decoded")
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, "decoded.npy")
+        np.lib.format.open_memmap(output_path, mode='w+', dtype=self.dtype, shape=shape).flush()
+        return output_path
+
+
+_ARCHIVE_DECODER = None  # Per-process decoder owned by each pool worker
+
+
+def _init_archive_worker(seed, smear_strength, block_size, dtype):
+    global _ARCHIVE_DECODER
+    _ARCHIVE_DECODER = FieldUnlockDecoder(known_seed=seed, smear_strength=smear_strength, block_size=block_size,
+                                          dtype=dtype)
+
+
+def _open_stack(ref):
+    if ref[0] == "npy":
+        return np.load(ref[1], mmap_mode='r')
+    _, filename, offset, dtype, shape, view_offset, view_dtype, view_shape, view_strides = ref
+    root = np.memmap(filename, mode='r', dtype=dtype, offset=offset, shape=shape)
+    return np.ndarray(view_shape, view_dtype, buffer=root, offset=view_offset, strides=view_strides)
+
+
+def _decode_archive_run(tasks):
+    """
+    Decodes a run of archive items in one worker call, opening each stacked source
+    and each decoded.npy once and flushing the outputs once at the end.
+    """
+    opened = {}
+    records = [_decode_archive_item(task, opened) for task in tasks]
+    for key, array in opened.items():
+        if key[0] == "out":
+            array.flush()
+    return records
+
+
+def _decode_archive_item(task, opened):
+    kind, ref, item, output_path = task
+    start = time.perf_counter()
+    record = {"item": item, "ok": True, "seconds": 0.0, "error": None, "output": output_path}
+
+    try:
+        if kind == "wav":
+            import soundfile as sf
+            signal, sr = sf.read(ref, dtype=_ARCHIVE_DECODER.dtype.name)
+            if signal.ndim > 1:
+                signal = signal[:, 0]  # Use first channel if stereo
+            sf.write(output_path, _ARCHIVE_DECODER.decode(signal), sr, subtype=sf.info(ref).subtype)
+        else:
+            if kind == "array":
+                signal = ref
+            else:
+                if ("in", ref) not in opened:
+                    opened["in", ref] = _open_stack(ref)
+                signal = opened["in", ref][item]
+            decoded = _ARCHIVE_DECODER.decode(signal)
+            if output_path is None:
+                record["output"] = decoded
+            else:
+                if ("out", output_path) not in opened:
+                    opened["out", output_path] = np.load(output_path, mmap_mode='r+')
+                opened["out", output_path][item] = decoded
+    except Exception as e:
+        record["ok"] = False
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python FieldUnlockDecoder.py <capture_dir | stacked.npy> [seed]
+    archive = sys.argv[1]
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 42
+    results = FieldUnlockDecoder(known_seed=seed).decode_archive(archive)
+    for r in results:
+        status = "OK" if r["ok"] else f"FAILED ({r['error']})"
+        print(f"  {r['item']}: {status} in {r['seconds'] * 1000:.1f} ms")
@@ -0,0 +1,187 @@
+"""
+FutakuchiCLI.py
+IX-Futakuchi-onna : Command-line entry point for the harmonic transmission pipeline
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+Single console entry point with transmit / encode / decode / simulate subcommands.
+Only argparse is loaded at startup; each subcommand imports the stage modules it needs,
+so audio hardware (sounddevice), soundfile and plotting are never touched unless required.
+Cold start of the non-hardware subcommands stays in the tens of milliseconds
+(measure with: python -X importtime FutakuchiCLI.py encode capture.wav).
+
+Usage (from src/):
+    python FutakuchiCLI.py transmit message.wav [--no-secure] [--no-lock | --concurrent] [--stream] [--simulate]
+    python FutakuchiCLI.py encode message.wav [--stream] [--frame-size 4096]
+    python FutakuchiCLI.py decode captures/ [--seed 42] [--output decoded/] [--workers 4]
+    python FutakuchiCLI.py simulate [--sessions 100] [--delay 0.02] [--noise 0.001]
+"""
+
+import argparse
+import sys
+
+SIM_BASE_FREQ = 111
+
+
+def _handshake_tone(sample_rate, base_freq=SIM_BASE_FREQ, seconds=1.0):
+    import numpy as np
+
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return sum(0.1 * np.sin(2 * np.pi * base_freq * h * t) for h in (3, 6, 9))
+
+
+def _dtype(args):
+    import numpy as np
+    return np.float32 if args.float32 else np.float64
+
+
+def cmd_transmit(args):
+    from TransmissionOrchestrator import TransmissionOrchestrator
+    from StageMetrics import StageMetrics, JsonLinesSink
+
+    backend = None
+    if args.simulate:
+        from AudioBackend import SimulatedChannel
+        backend = SimulatedChannel(sample_rate=args.sample_rate,
+                                   handshake=_handshake_tone(args.sample_rate, args.base_freq))
+
+    sinks = [JsonLinesSink(args.metrics_jsonl)] if args.metrics_jsonl else []
+    orchestrator = TransmissionOrchestrator(base_freq=args.base_freq, sample_rate=args.sample_rate,
+                                            metrics=StageMetrics(sinks=sinks), backend=backend,
+                                            dtype=_dtype(args))
+
+    if args.concurrent:
+        emitted = orchestrator.transmit_concurrent(args.wav, secure=not args.no_secure, stream=args.stream)
+    else:
+        orchestrator.transmit(args.wav, secure=not args.no_secure, require_lock=not args.no_lock,
+                              stream=args.stream)
+        emitted = orchestrator.metrics.outcomes().get("emitted", 0) > 0
+    return 0 if emitted else 1
+
+
+def cmd_encode(args):
+    import json
+    from HarmonicEncoder import HarmonicEncoder
+
+    encoder = HarmonicEncoder(sample_rate=args.sample_rate, dtype=_dtype(args))
+    if args.stream:
+        harmonics = encoder.encode_stream(args.wav, frame_size=args.frame_size)
+    else:
+        from WaveIO import open_wave
+
+        with open_wave(args.wav, sample_rate=args.sample_rate) as source:
+            harmonics = encoder.encode(source.read(channel=0, dtype=encoder.dtype))
+
+    print(json.dumps({str(h): float(a) for h, a in harmonics.items()}))
+    return 0
+
+
+def cmd_decode(args):
+    import os
+    from FieldUnlockDecoder import FieldUnlockDecoder
+
+    decoder = FieldUnlockDecoder(known_seed=args.seed, dtype=_dtype(args))
+
+    if not args.input.lower().endswith(".wav"):
+        results = decoder.decode_archive(args.input, output_dir=args.output, workers=args.workers)
+        for r in results:
+            status = "OK" if r["ok"] else f"FAILED ({r['error']})"
+            print(f"  {r['item']}: {status} in {r['seconds'] * 1000:.1f} ms")
+        return 0 if all(r["ok"] for r in results) else 1
+
+    import soundfile as sf
+
+    info = sf.info(args.input)
+    signal, sr = sf.read(args.input, dtype=decoder.dtype.name)
+    if signal.ndim > 1:
+        signal = signal[:, 0]
+    output = args.output or os.path.splitext(args.input)[0] + "_decoded.wav"
+    sf.write(output, decoder.decode(signal), sr, subtype=info.subtype)
+    print(f"  {args.input}: OK -> {output}")
+    return 0
+
+
+def cmd_simulate(args):
+    import os
+    import tempfile
+    import time
+    import numpy as np
+    import soundfile as sf
+    from AudioBackend import SimulatedChannel
+    from TransmissionOrchestrator import TransmissionOrchestrator
+
+    channel = SimulatedChannel(sample_rate=args.sample_rate, delay=args.delay, attenuation=args.attenuation,
+                               noise_std=args.noise, handshake=_handshake_tone(args.sample_rate, args.base_freq),
+                               seed=args.seed)
+    orchestrator = TransmissionOrchestrator(base_freq=args.base_freq, sample_rate=args.sample_rate,
+                                            backend=channel, dtype=_dtype(args))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        wav_path = os.path.join(workdir, "message.wav")
+        t = np.arange(args.sample_rate) / args.sample_rate
+        sf.write(wav_path, 0.5 * np.sin(2 * np.pi * args.base_freq * t), args.sample_rate)
+
+        start = time.perf_counter()
+        for _ in range(args.sessions):
+            orchestrator.transmit(wav_path, secure=True, require_lock=True)
+        elapsed = time.perf_counter() - start
+
+    print(f"[SIM] {len(channel.emitted)}/{args.sessions} sessions emitted "
+          f"({args.sessions / elapsed * 60:.0f} sessions/min)")
+    return 0 if len(channel.emitted) == args.sessions else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="futakuchi", description="IX-Futakuchi-onna harmonic transmission")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every pipeline stage")
+    parser.add_argument("--sample-rate", type=int, default=44100)
+    parser.add_argument("--base-freq", type=float, default=SIM_BASE_FREQ)
+    parser.add_argument("--float32", action="store_true", help="Run every stage in single precision")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    transmit = commands.add_parser("transmit", help="Encode, secure and emit a WAV message")
+    transmit.add_argument("wav")
+    transmit.add_argument("--no-secure", action="store_true", help="Skip entropy masking")
+    # --concurrent overlaps preparation with the handshake listen, so it cannot skip the handshake
+    lock_mode = transmit.add_mutually_exclusive_group()
+    lock_mode.add_argument("--no-lock", action="store_true", help="Emit without waiting for a handshake")
+    lock_mode.add_argument("--concurrent", action="store_true", help="Listen for the handshake while preparing")
+    transmit.add_argument("--stream", action="store_true", help="Block-read Welch encoding for long files")
+    transmit.add_argument("--simulate", action="store_true", help="Use the simulated channel instead of hardware")
+    transmit.add_argument("--metrics-jsonl", help="Append per-stage timings to this JSON-lines file")
+    transmit.set_defaults(func=cmd_transmit)
+
+    encode = commands.add_parser("encode", help="Print the 3/6/9 harmonic vector of a WAV as JSON")
+    encode.add_argument("wav")
+    encode.add_argument("--stream", action="store_true")
+    encode.add_argument("--frame-size", type=int, default=4096)
+    encode.set_defaults(func=cmd_encode)
+
+    decode = commands.add_parser("decode", help="Decode a WAV capture, a capture directory or a stacked .npy")
+    decode.add_argument("input")
+    decode.add_argument("--seed", type=int, default=42)
+    decode.add_argument("--output", help="Output file (single WAV) or directory (archives)")
+    decode.add_argument("--workers", type=int)
+    decode.set_defaults(func=cmd_decode)
+
+    simulate = commands.add_parser("simulate", help="Run transmit/handshake sessions over a simulated channel")
+    simulate.add_argument("--sessions", type=int, default=100)
+    simulate.add_argument("--delay", type=float, default=0.02, help="Propagation delay in seconds")
+    simulate.add_argument("--attenuation", type=float, default=0.8)
+    simulate.add_argument("--noise", type=float, default=0.001, help="Channel noise standard deviation")
+    simulate.add_argument("--seed", type=int, default=369)
+    simulate.set_defaults(func=cmd_simulate)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    import logging
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
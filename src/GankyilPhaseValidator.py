@@ -13,28 +13,35 @@ Ideal for automated lab validation, transmission integrity checks, or signal tam
 import numpy as np
 
 class GankyilPhaseValidator:
-    def __init__(self, x_signal, y_signal, z_signal, sample_rate=44100):
+    def __init__(self, x_signal, y_signal, z_signal, sample_rate=44100, num_bins=4, tolerance_deg=10):
         self.x = x_signal
         self.y = y_signal
         self.z = z_signal
         self.sample_rate = sample_rate
         self.N = len(x_signal)
-        self.time = np.linspace(0, self.N / sample_rate, self.N, endpoint=False)
+        self.num_bins = num_bins  # Dominant harmonic bins used for the phase comparison
+        self.tolerance_deg = tolerance_deg
 
-    def _calc_phase_offset(self, a, b):
+    @staticmethod
+    def _phase_offsets(spectra, num_bins):
         """
-        Returns the average phase difference between two signals in degrees.
+        Phase offsets X→Y, Y→Z, Z→X in degrees from rfft spectra shaped (..., 3, F).
+        Only the num_bins strongest bins (summed over channels, DC excluded) are compared,
+        as a magnitude-weighted circular mean of the cross-spectrum phase.
         """
-        analytic_a = np.angle(np.fft.fft(a))
-        analytic_b = np.angle(np.fft.fft(b))
-        phase_diff = np.unwrap(analytic_b - analytic_a)
-        avg_diff_deg = np.mean(np.rad2deg(phase_diff)) % 360
-        return avg_diff_deg
+        strength = np.abs(spectra).sum(axis=-2)
+        strength[..., 0] = 0.0
+        num_bins = min(num_bins, strength.shape[-1] - 1)
+        bins = np.argpartition(strength, -num_bins, axis=-1)[..., -num_bins:]
+
+        selected = np.take_along_axis(spectra, bins[..., np.newaxis, :], axis=-1)
+        x, y, z = selected[..., 0, :], selected[..., 1, :], selected[..., 2, :]
+        cross = np.stack([y * np.conj(x), z * np.conj(y), x * np.conj(z)], axis=-2).sum(axis=-1)
+        return np.rad2deg(np.angle(cross)) % 360
 
     def validate(self):
-        x_y = self._calc_phase_offset(self.x, self.y)
-        y_z = self._calc_phase_offset(self.y, self.z)
-        z_x = self._calc_phase_offset(self.z, self.x)
+        spectra = np.fft.rfft(np.stack([self.x, self.y, self.z]), axis=-1)
+        x_y, y_z, z_x = self._phase_offsets(spectra, self.num_bins)
 
         print("[GANKYIL VALIDATOR]")
         print(f"X → Y phase diff: {x_y:.2f}°")
@@ -42,8 +49,23 @@ class GankyilPhaseValidator:
         print(f"Z → X phase diff: {z_x:.2f}°")
 
         valid = all(
-            abs(angle - 120) <= 10 for angle in [x_y, y_z, (360 - z_x) % 360]
+            abs(angle - 120) <= self.tolerance_deg for angle in [x_y, y_z, z_x]
         )
 
         print("✔️ Gankyil structure VALID" if valid else "❌ Gankyil structure BROKEN")
         return valid
+
+    @classmethod
+    def validate_batch(cls, triples, num_bins=4, tolerance_deg=10):
+        """
+        Validates many captured frames at once.
+        Input:
+            triples (np.ndarray): shape (M, 3, N) — X, Y, Z signals per frame
+        Output:
+            valid (np.ndarray): (M,) bool
+            offsets (np.ndarray): (M, 3) X→Y, Y→Z, Z→X phase offsets in degrees
+        """
+        spectra = np.fft.rfft(np.asarray(triples), axis=-1)
+        offsets = cls._phase_offsets(spectra, num_bins)
+        valid = np.all(np.abs(offsets - 120) <= tolerance_deg, axis=-1)
+        return valid, offsets
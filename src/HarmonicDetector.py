@@ -0,0 +1,107 @@
+"""
+HarmonicDetector.py
+IX-Futakuchi-onna : Sparse targeted-DFT detector for Tesla 3-6-9 harmonic tones
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+Computes spectral magnitudes at only the requested frequencies instead of a full FFT.
+Samples are processed in fixed-size chunks against a cached twiddle table, so the cost is
+O(N * k) for k target tones and memory stays at chunk_size * k regardless of signal length.
+Works on single 1D signals and on batches shaped (..., N).
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+class HarmonicDetector:
+    def __init__(self, sample_rate=44100, chunk_size=4096, cache_size=8):
+        """
+        cache_size: twiddle tables kept (least recently used evicted first); each is chunk_size * k
+        """
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self._twiddle_cache = OrderedDict()  # Twiddle tables keyed by (length, chunk, bins, complex dtype)
+
+    def nearest_bins(self, freqs, n):
+        """
+        Maps target frequencies to the nearest positive FFT bin of an n-sample frame.
+        """
+        bin_hz = self.sample_rate / n
+        bins = np.rint(np.asarray(freqs, dtype=float) / bin_hz).astype(int)
+        return np.clip(bins, 1, max((n - 1) // 2, 1))
+
+    def amplitudes(self, signal, freqs, window=None, snap_to_bin=True):
+        """
+        Returns |DFT| of the signal at each target frequency.
+
+        Inputs:
+            signal (np.ndarray): 1D signal or batch shaped (..., N)
+            freqs (sequence): target frequencies in Hz
+            window (np.ndarray): optional length-N window applied before the transform
+            snap_to_bin (bool): evaluate at the nearest FFT bin (matches full-FFT lookups);
+                                otherwise evaluate at the exact frequency
+        Output:
+            amplitudes (np.ndarray): shape (..., len(freqs))
+        """
+        signal = np.asarray(signal)
+        n = signal.shape[-1]
+
+        if snap_to_bin:
+            bins = self.nearest_bins(freqs, n).astype(float)
+        else:
+            bins = np.asarray(freqs, dtype=float) * n / self.sample_rate
+
+        # float32 input is transformed in complex64, everything else in complex128
+        ctype = np.result_type(signal.dtype, np.complex64)
+        chunk = min(n, self.chunk_size)
+        twiddle = self._twiddles(n, chunk, bins, ctype)
+        acc = np.zeros(signal.shape[:-1] + (len(bins),), dtype=ctype)
+
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            segment = signal[..., start:stop]
+            if window is not None:
+                segment = np.multiply(segment, window[start:stop], dtype=np.finfo(ctype).dtype)
+
+            # Chunk offset folds into one phase rotation per target bin
+            rotation = np.exp(-2j * np.pi * bins * start / n).astype(ctype)
+            acc += (segment @ twiddle[:stop - start]) * rotation
+
+        return np.abs(acc)
+
+    def harmonic_amplitudes(self, signal, base_freq, harmonics=(3, 6, 9), window=None):
+        """
+        Convenience wrapper returning {harmonic: amplitude} for a single signal,
+        or an array of shape (..., len(harmonics)) for a batch.
+        """
+        freqs = [base_freq * h for h in harmonics]
+        amps = self.amplitudes(signal, freqs, window=window)
+        if amps.ndim == 1:
+            return dict(zip(harmonics, amps))
+        return amps
+
+    def _twiddles(self, n, chunk, bins, ctype=np.complex128):
+        key = (n, chunk, tuple(bins), np.dtype(ctype))
+        twiddle = self._twiddle_cache.get(key)
+        if twiddle is None:
+            twiddle = np.exp(-2j * np.pi * np.outer(np.arange(chunk), bins) / n).astype(ctype)
+            self._twiddle_cache[key] = twiddle
+            while len(self._twiddle_cache) > self.cache_size:
+                self._twiddle_cache.popitem(last=False)
+        else:
+            self._twiddle_cache.move_to_end(key)
+        return twiddle
+
+
+if __name__ == "__main__":
+    sample_rate = 44100
+    t = np.arange(sample_rate) / sample_rate
+    waveform = 0.8 * np.sin(2 * np.pi * 333 * t) + 0.4 * np.sin(2 * np.pi * 666 * t)
+
+    detector = HarmonicDetector(sample_rate=sample_rate)
+    for harmonic, amplitude in detector.harmonic_amplitudes(waveform, base_freq=111).items():
+        print(f"{harmonic}x: {amplitude:.3f}")
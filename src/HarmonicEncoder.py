@@ -9,56 +9,211 @@ Converts analog waveform (e.g. voice or tone signal) into a Tesla-encoded harmon
 3x, 6x, and 9x harmonic extraction. Output is a frequency-domain vector prepared for field modulation.
 """
 
+import functools
+
 import numpy as np
-from scipy.fftpack import fft
-from scipy.signal import hann
 
 
 class HarmonicEncoder:
-    def __init__(self, sample_rate=44100):
+    def __init__(self, sample_rate=44100, detector=None, dtype=np.float64):
+        """
+        dtype: working precision; np.float32 keeps windowing and FFTs in float32/complex64
+        """
         self.sample_rate = sample_rate
         self.target_harmonics = [3, 6, 9]  # Base Tesla harmonics
+        self.detector = detector  # Optional HarmonicDetector for sparse harmonic reads
+        self.dtype = np.dtype(dtype)
 
-    def encode(self, waveform):
+    def encode(self, waveform, base_freq=None):
         """
         Main encoding function.
         Input:
             waveform (np.ndarray) - 1D array of time-domain samples (normalized)
+            base_freq (float) - optional known fundamental; with a detector attached,
+                                only the harmonic bins are computed (no full FFT)
         Output:
             harmonic_vector (dict) - {harmonic_multiple: amplitude}
         """
         if not isinstance(waveform, np.ndarray):
             raise TypeError("Waveform must be a NumPy array")
 
-        window = hann(len(waveform))
-        windowed = waveform * window
-        spectrum = np.abs(fft(windowed))
-        freqs = np.fft.fftfreq(len(waveform), 1.0 / self.sample_rate)
+        if base_freq is not None and self.detector is not None:
+            freqs = [base_freq * m for m in self.target_harmonics]
+            amplitudes = self.detector.amplitudes(waveform, freqs, window=_hann(len(waveform), self.dtype, cache=False))
+            return dict(zip(self.target_harmonics, amplitudes))
 
-        # Only take positive frequencies
-        mask = freqs > 0
-        freqs = freqs[mask]
-        spectrum = spectrum[mask]
+        n = len(waveform)
+        windowed = np.multiply(waveform, _hann(n, self.dtype, cache=False), dtype=self.dtype)
 
-        base_freq = self._estimate_fundamental(freqs, spectrum)
+        # Only take positive frequencies (bins 1 .. (n - 1) // 2, as with fftfreq > 0)
+        spectrum = np.abs(np.fft.rfft(windowed))[1:(n - 1) // 2 + 1]
+        bin_hz = self.sample_rate / n
+
+        if base_freq is None:
+            base_freq = self._estimate_fundamental(spectrum, bin_hz)
         harmonic_vector = {}
 
         for multiplier in self.target_harmonics:
             harmonic_freq = base_freq * multiplier
-            idx = (np.abs(freqs - harmonic_freq)).argmin()
+            # Nearest positive bin; spectrum[i] holds bin i + 1
+            idx = min(max(int(np.rint(harmonic_freq / bin_hz)), 1), len(spectrum)) - 1
             harmonic_vector[multiplier] = spectrum[idx]
 
         return harmonic_vector
 
-    def _estimate_fundamental(self, freqs, spectrum):
+    def encode_batch(self, waveforms):
+        """
+        Batched encoding for many equal-length captures at once.
+        Input:
+            waveforms (np.ndarray or list) - 2D array (captures x samples) or list of equal-length 1D arrays
+        Output:
+            amplitudes (np.ndarray) - (captures x len(target_harmonics)) harmonic amplitudes
+            fundamentals (np.ndarray) - (captures,) estimated fundamental per capture in Hz
+        """
+        batch = np.asarray(waveforms)
+        if batch.ndim == 1:
+            batch = batch[np.newaxis, :]
+        if batch.ndim != 2:
+            raise ValueError("Batch must be a 2D array or a list of equal-length 1D arrays")
+
+        return self._pick_harmonics(self._frame_spectra(batch), batch.shape[1])
+
+    def stream_frames(self, wav_path, frame_size=4096, hop_size=None, frames_per_batch=64):
+        """
+        Streaming STFT encoder for long recordings.
+        Reads the WAV file in fixed blocks and yields one harmonic vector per analysis frame,
+        so peak memory is bounded by frame_size * frames_per_batch regardless of file length.
+        Yields:
+            (base_freq, harmonic_vector) per frame
+        """
+        hop_size = hop_size or frame_size // 2
+        batch = np.zeros((frames_per_batch, frame_size), dtype=self.dtype)
+        filled = 0
+
+        for frame in self._read_frames(wav_path, frame_size, hop_size):
+            batch[filled] = frame
+            filled += 1
+            if filled == frames_per_batch:
+                yield from self._batch_vectors(batch)
+                filled = 0
+
+        if filled:
+            yield from self._batch_vectors(batch[:filled])
+
+    def encode_stream(self, wav_path, frame_size=4096, hop_size=None):
+        """
+        Welch-averaged encoding of a WAV file read block by block.
+        Power spectra of all frames are averaged before harmonic extraction,
+        giving a single harmonic vector on the per-frame amplitude scale.
+        Output:
+            harmonic_vector (dict) - {harmonic_multiple: amplitude}
+        """
+        hop_size = hop_size or frame_size // 2
+        power_sum = None
+        frame_count = 0
+
+        for frame in self._read_frames(wav_path, frame_size, hop_size):
+            power = self._frame_spectra(frame[np.newaxis, :]) ** 2
+            power_sum = power if power_sum is None else power_sum + power
+            frame_count += 1
+
+        if frame_count == 0:
+            raise ValueError(f"No audio frames found in {wav_path}")
+
+        averaged = np.sqrt(power_sum / frame_count)
+        amplitudes, _ = self._pick_harmonics(averaged, frame_size)
+        return dict(zip(self.target_harmonics, amplitudes[0]))
+
+    def _read_frames(self, wav_path, frame_size, hop_size):
+        """
+        Yields overlapping mono frames of frame_size samples, zero-padding the final partial frame.
+        Frames come straight from the memory-mapped file (zero-copy when the file stores self.dtype).
+        """
+        from WaveIO import open_wave
+
+        with open_wave(wav_path, sample_rate=self.sample_rate) as source:
+            # Use first channel if multi-channel
+            yield from source.blocks(frame_size, overlap=frame_size - hop_size, dtype=self.dtype, fill_value=0.0)
+
+    def _batch_vectors(self, batch):
+        amplitudes, fundamentals = self.encode_batch(batch)
+        for base_freq, row in zip(fundamentals, amplitudes):
+            yield base_freq, dict(zip(self.target_harmonics, row))
+
+    def _frame_spectra(self, batch):
+        """
+        Windowed magnitude spectra over the positive-frequency bins (1 .. (n - 1) // 2).
+        """
+        n = batch.shape[1]
+        spectrum = np.abs(np.fft.rfft(np.multiply(batch, _hann(n, self.dtype), dtype=self.dtype), axis=1))
+
+        # Positive frequencies only, matching the fftfreq layout used by encode()
+        return spectrum[:, 1:(n - 1) // 2 + 1]
+
+    def _pick_harmonics(self, spectrum, n):
+        """
+        Fundamental and harmonic amplitudes from positive-bin spectra of n-sample frames.
+        """
+        last_bin = spectrum.shape[1]
+        bin_hz = self.sample_rate / n
+
+        # Fundamental: strongest bin below 1 kHz
+        low_bins = int(np.sum(np.arange(1, last_bin + 1) * bin_hz < 1000))
+        if low_bins == 0:
+            raise ValueError(f"{n}-sample frames are too short to resolve a fundamental below 1 kHz")
+        fundamental_bins = np.argmax(spectrum[:, :low_bins], axis=1) + 1
+        fundamentals = fundamental_bins * bin_hz
+
+        # Harmonics of a bin-aligned fundamental fall on exact bins, so no nearest-bin search is needed
+        multipliers = np.asarray(self.target_harmonics)
+        harmonic_bins = np.clip(fundamental_bins[:, np.newaxis] * multipliers, 1, last_bin)
+        amplitudes = np.take_along_axis(spectrum, harmonic_bins - 1, axis=1)
+
+        return amplitudes, fundamentals
+
+    def _estimate_fundamental(self, spectrum, bin_hz):
         """
         Estimate fundamental frequency by detecting peak in lower frequency band.
+        spectrum holds positive bins 1, 2, ... spaced bin_hz apart.
         """
-        low_band = (freqs < 1000)  # Focus on speech-relevant band
-        low_freqs = freqs[low_band]
-        low_spectrum = spectrum[low_band]
-        fundamental_idx = np.argmax(low_spectrum)
-        return low_freqs[fundamental_idx]
+        low_bins = min(int(np.ceil(1000 / bin_hz)) - 1, len(spectrum))  # Focus on speech-relevant band
+        if low_bins <= 0:
+            raise ValueError("Waveform is too short to resolve a fundamental below 1 kHz")
+        fundamental_idx = np.argmax(spectrum[:low_bins])
+        return (fundamental_idx + 1) * bin_hz
+
+
+def _hann(length, dtype, cache=True):
+    """
+    Symmetric Hann window (same as scipy.signal.windows.hann).
+    Fixed frame lengths (batch/stream encoding) come from a small LRU cache; one-off
+    full-capture windows are built fresh so long files do not pin a window per encoder.
+    """
+    if cache:
+        return _cached_hann(length, np.dtype(dtype))
+    return _build_hann(length, dtype)
+
+
+@functools.lru_cache(maxsize=4)
+def _cached_hann(length, dtype):
+    window = _build_hann(length, dtype)
+    window.flags.writeable = False
+    return window
+
+
+def _build_hann(length, dtype, block_size=65536):
+    """
+    np.hanning(length) computed block by block straight into dtype, so a float32 window
+    never needs a full-length float64 temporary.
+    """
+    if length < 2:
+        return np.ones(length, dtype=dtype)
+    window = np.empty(length, dtype=dtype)
+    for start in range(0, length, block_size):
+        stop = min(start + block_size, length)
+        k = np.arange(1 - length + 2 * start, 1 - length + 2 * stop, 2)  # np.hanning's sample positions
+        window[start:stop] = 0.5 + 0.5 * np.cos(np.pi * k / (length - 1))
+    return window
 
 
 if __name__ == "__main__":
@@ -77,4 +232,6 @@ if __name__ == "__main__":
 
     # Optional: visualize spectrum
     plt.title("Harmonic Signature")
-    plt.bar([f"{k}x]()
+    plt.bar([f"{k}x" for k in output.keys()], list(output.values()))
+    plt.ylabel("Amplitude")
+    plt.show()
@@ -13,6 +13,9 @@ The key must be known to the receiver to reverse the shift and decode the origin
 import numpy as np
 import hashlib
 
+# Structured-array form of an encrypted vector: one (freq, amp) record per harmonic
+ENCRYPTED_DTYPE = np.dtype([('freq', np.float64), ('amp', np.float64)])
+
 
 class HarmonicEncryptor:
     def __init__(self, encryption_key="IX369", max_offset_hz=12.0):
@@ -27,7 +30,7 @@ class HarmonicEncryptor:
         digest = hashlib.sha256(self.key.encode()).digest()
         return int.from_bytes(digest[:4], 'big')  # 32-bit int
 
-    def encrypt(self, harmonic_vector, base_freq):
+    def encrypt(self, harmonic_vector, base_freq, as_array=False):
         """
         Encrypt harmonic vector by shifting each frequency slightly
         based on the hashed encryption key.
@@ -35,6 +38,7 @@ class HarmonicEncryptor:
         Inputs:
             harmonic_vector (dict): {3: amplitude, 6: amplitude, 9: amplitude}
             base_freq (float): Fundamental frequency
+            as_array (bool): return a structured array of ENCRYPTED_DTYPE instead of a list
         Returns:
             encrypted_vector (list of tuples): [(freq1, amp1), (freq2, amp2), ...]
         """
@@ -47,6 +51,8 @@ class HarmonicEncryptor:
             encrypted_freq = base_hz + offset
             encrypted_vector.append((encrypted_freq, amp))
 
+        if as_array:
+            return np.array(encrypted_vector, dtype=ENCRYPTED_DTYPE)
         return encrypted_vector
 
     def decrypt(self, encrypted_vector, base_freq):
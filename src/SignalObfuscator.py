@@ -12,25 +12,103 @@ Intended for pre-emission signal masking. Fully reversible for matched receivers
 
 import numpy as np
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 
 class SignalObfuscator:
-    def __init__(self, noise_key="OBF-369", noise_strength=0.2):
+    def __init__(self, noise_key="OBF-369", noise_strength=0.2, counter_mode=False, block_size=65536,
+                 dtype=np.float64):
         """
         noise_strength: 0.0 to 1.0 — proportion of added noise relative to signal amplitude
+        counter_mode: derive noise per block from a Philox generator keyed by (key hash, block index),
+                      so any block can be produced independently, in parallel, or out of order
+        block_size: samples per independently generated noise block in counter mode
+        dtype: noise precision. The key stream is drawn in float64 block by block and rounded,
+               so float32 and float64 instances mask and unmask with the same noise.
         """
         self.key = noise_key
         self.noise_strength = noise_strength
+        self.counter_mode = counter_mode
+        self.block_size = block_size
+        self.dtype = np.dtype(dtype)
         self.seed = self._generate_seed()
 
     def _generate_seed(self):
         digest = hashlib.sha256(self.key.encode()).digest()
         return int.from_bytes(digest[:4], 'big')
 
-    def apply_noise(self, waveform):
+    def _noise(self, shape):
+        if self.counter_mode:
+            return self.generate_noise(int(np.prod(shape))).reshape(shape)
+
+        # Drawn block by block into the output buffer; the legacy normal stream is identical
+        # to a single full-size draw, without a full-size float64 temporary
         rng = np.random.RandomState(self.seed)
-        noise = rng.normal(loc=0.0, scale=1.0, size=waveform.shape)
-        noise = noise * self.noise_strength
+        noise = np.empty(shape, dtype=self.dtype)
+        flat = noise.reshape(-1)
+        for start in range(0, flat.size, self.block_size):
+            stop = min(start + self.block_size, flat.size)
+            np.multiply(rng.normal(loc=0.0, scale=1.0, size=stop - start), self.noise_strength,
+                        out=flat[start:stop], casting='same_kind')
+        return noise
+
+    def noise_block(self, index):
+        """
+        Counter mode: scaled noise for block `index` (samples index * block_size onward).
+        """
+        rng = np.random.Generator(np.random.Philox(key=(index << 64) | self.seed))
+        block = rng.standard_normal(self.block_size)
+        block *= self.noise_strength
+        return block.astype(self.dtype, copy=False)
+
+    def noise_segment(self, start, stop, out=None):
+        """
+        Counter mode: noise for samples [start, stop) without generating anything before start.
+        """
+        if out is None:
+            out = np.empty(stop - start, dtype=self.dtype)
+
+        first = start // self.block_size
+        last = (stop - 1) // self.block_size
+        for index in range(first, last + 1):
+            block_start = index * self.block_size
+            lo = max(start, block_start)
+            hi = min(stop, block_start + self.block_size)
+            out[lo - start:hi - start] = self.noise_block(index)[lo - block_start:hi - block_start]
+        return out
+
+    def generate_noise(self, size, workers=1):
+        """
+        Counter mode: noise for samples [0, size), blocks generated across `workers` threads.
+        Identical to concatenating noise_segment() over any partition of the range.
+        """
+        noise = np.empty(size, dtype=self.dtype)
+        starts = range(0, size, self.block_size)
+
+        def fill(start):
+            stop = min(start + self.block_size, size)
+            self.noise_segment(start, stop, out=noise[start:stop])
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(fill, starts))
+        else:
+            for start in starts:
+                fill(start)
+        return noise
+
+    def apply_noise_segment(self, chunk, start):
+        """
+        Counter mode streaming: masks a chunk that begins at sample `start`.
+        No clip normalization is applied, since the global peak is unknown per chunk.
+        """
+        return chunk + self.noise_segment(start, start + len(chunk))
+
+    def remove_noise_segment(self, chunk, start):
+        return chunk - self.noise_segment(start, start + len(chunk))
+
+    def apply_noise(self, waveform):
+        noise = self._noise(waveform.shape)
 
         obfuscated = waveform + noise
         max_val = np.max(np.abs(obfuscated))
@@ -40,9 +118,7 @@ class SignalObfuscator:
         return obfuscated, noise
 
     def remove_noise(self, obfuscated_waveform):
-        rng = np.random.RandomState(self.seed)
-        noise = rng.normal(loc=0.0, scale=1.0, size=obfuscated_waveform.shape)
-        noise = noise * self.noise_strength
+        noise = self._noise(obfuscated_waveform.shape)
 
         restored = obfuscated_waveform - noise
         return restored
@@ -14,39 +14,109 @@ All layers are cryptographically reversible by FieldResonanceDecoder with correc
 Supports DARPA-grade in-flight masking and environmental coherence avoidance.
 """
 
+import os
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 class SignalObfuscatorV2:
-    def __init__(self, seed=None):
-        if seed is not None:
-            np.random.seed(seed)
+    def __init__(self, seed=None, smear_strength=0.03, block_size=1024, dtype=np.float64):
+        """
+        seed: key for the per-instance generator. Without one, fresh entropy is drawn once,
+              so the instance still has a fixed, reproducible key stream.
+        dtype: signal precision; np.float32 keeps the FFTs in complex64. The key stream is
+               always drawn in float64 and rounded, so it is the same for either precision.
+        Every message starts from the same key stream (reset-per-message), so matching
+        FieldUnlockDecoder instances can decode messages independently and concurrently.
+        """
+        self.seed = seed if seed is not None else np.random.SeedSequence().entropy
+        self.smear_strength = smear_strength
+        self.block_size = block_size
+        self.dtype = np.dtype(dtype)
+        self.reset()
+
+    def reset(self):
+        """
+        Rewinds the instance generator used by standalone smear/scramble calls.
+        """
+        self.rng = np.random.default_rng(self.seed)
 
-    def smear_spectrum(self, signal, smear_strength=0.03):
+    def smear_spectrum(self, signal, smear_strength=None, rng=None):
         """
         Spreads harmonic energy across neighboring bands to blur spectral fingerprint.
+        Uses a real-input FFT: one smear gain per non-negative frequency bin.
         """
-        fft = np.fft.fft(signal)
-        spectrum = np.abs(fft)
-        phase = np.angle(fft)
+        rng = rng or self.rng
+        smear_strength = self.smear_strength if smear_strength is None else smear_strength
 
-        smear = np.random.normal(1.0, smear_strength, size=spectrum.shape)
-        smeared_fft = smear * spectrum * np.exp(1j * phase)
-        return np.real(np.fft.ifft(smeared_fft))
+        spectrum = np.fft.rfft(signal)
+        smear = rng.normal(1.0, smear_strength, size=spectrum.shape).astype(spectrum.real.dtype)
+        return np.fft.irfft(smear * spectrum, n=len(signal))
 
-    def scramble_phase(self, signal, block_size=1024):
+    def scramble_phase(self, signal, block_size=None, rng=None):
         """
         Scrambles the phase of blocks within the signal for time-domain masking.
+        Full blocks are scaled in one broadcast multiply; a trailing partial block passes through unchanged.
         """
-        num_blocks = len(signal) // block_size
-        scrambled = np.zeros_like(signal)
+        rng = rng or self.rng
+        block_size = block_size or self.block_size
 
-        for i in range(num_blocks):
-            block = signal[i * block_size:(i + 1) * block_size]
-            phase_shift = np.random.uniform(-np.pi, np.pi)
-            scrambled[i * block_size:(i + 1) * block_size] = block * np.cos(phase_shift)
-        return scrambled
+        num_blocks = len(signal) // block_size
+        shifts = rng.uniform(-np.pi, np.pi, size=num_blocks)
+        return self._scale_blocks(signal, np.cos(shifts), block_size)
 
     def obfuscate(self, signal):
-        smeared = self.smear_spectrum(signal)
-        scrambled = self.scramble_phase(smeared)
+        rng = np.random.default_rng(self.seed)  # Reset per message
+        signal = np.asarray(signal, dtype=self.dtype)
+        smeared = self.smear_spectrum(signal, rng=rng)
+        scrambled = self.scramble_phase(smeared, rng=rng)
         return scrambled
+
+    def obfuscate_many(self, signals, workers=None):
+        """
+        Batched obfuscation of a 2D array (messages x samples).
+        The key stream is drawn once and broadcast over the batch; row chunks are spread
+        across a thread pool (NumPy FFTs release the GIL).
+        """
+        signals = np.asarray(signals, dtype=self.dtype)
+        n = signals.shape[1]
+        smear, gains = self._message_key(n)
+
+        def run(chunk):
+            smeared = np.fft.irfft(smear * np.fft.rfft(chunk, axis=1), n=n, axis=1)
+            return self._scale_blocks(smeared, gains, self.block_size)
+
+        return _map_row_chunks(run, signals, workers)
+
+    def _message_key(self, n):
+        """
+        Smear gains and block gains for an n-sample message, in obfuscate() draw order.
+        """
+        rng = np.random.default_rng(self.seed)
+        smear = rng.normal(1.0, self.smear_strength, size=n // 2 + 1).astype(self.dtype)
+        shifts = rng.uniform(-np.pi, np.pi, size=n // self.block_size)
+        return smear, np.cos(shifts).astype(self.dtype)
+
+    @staticmethod
+    def _scale_blocks(signal, gains, block_size):
+        """
+        Multiplies each full block along the last axis by its gain; the tail is copied as-is.
+        Float input keeps its precision.
+        """
+        scaled = np.array(signal, dtype=np.result_type(signal, np.float32))
+        body_len = gains.shape[-1] * block_size
+        body = scaled[..., :body_len].reshape(scaled.shape[:-1] + (-1, block_size))
+        body *= gains[..., np.newaxis]
+        return scaled
+
+
+def _map_row_chunks(func, rows, workers=None):
+    """
+    Applies func to contiguous row chunks of a 2D array on a thread pool and stacks the results.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(rows))
+    if workers <= 1:
+        return func(rows)
+
+    chunks = np.array_split(rows, workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return np.concatenate(list(pool.map(func, chunks)))
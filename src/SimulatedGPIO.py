@@ -0,0 +1,147 @@
+"""
+SimulatedGPIO.py
+IX-Futakuchi-onna : RPi.GPIO stand-in for exercising field lock detection without a Raspberry Pi
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+Mimics the subset of RPi.GPIO used by FieldResonanceDecoder (setmode, setup, input, output,
+add_event_detect with bouncetime, remove_event_detect, event_detected, cleanup).
+Pin levels are driven from test code with drive(pin, level). As on the real library, edge
+callbacks run on a separate dispatch thread, and edges arriving within bouncetime of the last
+reported edge are dropped. event_time(channel) is a simulation extension that returns when the
+edge currently being dispatched occurred, so callers can measure edge-to-callback latency.
+"""
+
+import queue
+import threading
+import time
+
+BCM = 11
+BOARD = 10
+IN = 1
+OUT = 0
+LOW = 0
+HIGH = 1
+PUD_OFF = 20
+PUD_DOWN = 21
+PUD_UP = 22
+RISING = 31
+FALLING = 32
+BOTH = 33
+
+
+class SimulatedGPIO:
+    BCM, BOARD, IN, OUT, LOW, HIGH = BCM, BOARD, IN, OUT, LOW, HIGH
+    PUD_OFF, PUD_DOWN, PUD_UP = PUD_OFF, PUD_DOWN, PUD_UP
+    RISING, FALLING, BOTH = RISING, FALLING, BOTH
+
+    def __init__(self):
+        self.mode = None
+        self._levels = {}
+        self._directions = {}
+        self._detect = {}  # channel -> [edge, bouncetime_s, callbacks, last_reported, detected]
+        self._event_times = {}
+        self._lock = threading.Lock()
+        self._events = queue.Queue()
+        self._dispatcher = None
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setup(self, channel, direction, pull_up_down=PUD_OFF, initial=None):
+        with self._lock:
+            self._directions[channel] = direction
+            if initial is not None:
+                self._levels[channel] = initial
+            else:
+                self._levels.setdefault(channel, HIGH if pull_up_down == PUD_UP else LOW)
+
+    def input(self, channel):
+        with self._lock:
+            return self._levels.get(channel, LOW)
+
+    def output(self, channel, level):
+        self.drive(channel, level)
+
+    def drive(self, channel, level):
+        """
+        Sets a pin level from outside (the simulated sensor), firing edge detection on a change.
+        """
+        level = HIGH if level else LOW
+        now = time.perf_counter()
+        with self._lock:
+            previous = self._levels.get(channel, LOW)
+            self._levels[channel] = level
+            detect = self._detect.get(channel)
+            if previous == level or detect is None:
+                return
+            edge, bouncetime, callbacks, last_reported, _ = detect
+            if edge != BOTH and edge != (RISING if level == HIGH else FALLING):
+                return
+            if last_reported is not None and now - last_reported < bouncetime:
+                return
+            detect[3] = now
+            detect[4] = True
+            if callbacks:
+                self._events.put((channel, now, list(callbacks)))
+
+    def add_event_detect(self, channel, edge, callback=None, bouncetime=None):
+        with self._lock:
+            if channel in self._detect:
+                raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+            self._detect[channel] = [edge, (bouncetime or 0) / 1000.0, [], None, False]
+        if callback is not None:
+            self.add_event_callback(channel, callback)
+
+    def add_event_callback(self, channel, callback):
+        with self._lock:
+            if channel not in self._detect:
+                raise RuntimeError("Add event detection using add_event_detect first before adding a callback")
+            self._detect[channel][2].append(callback)
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+                self._dispatcher.start()
+
+    def remove_event_detect(self, channel):
+        with self._lock:
+            self._detect.pop(channel, None)
+
+    def event_detected(self, channel):
+        with self._lock:
+            detect = self._detect.get(channel)
+            if detect is None or not detect[4]:
+                return False
+            detect[4] = False
+            return True
+
+    def event_time(self, channel):
+        """
+        perf_counter time of the edge whose callback is running (simulation extension).
+        """
+        return self._event_times.get(channel)
+
+    def cleanup(self, channel=None):
+        with self._lock:
+            channels = list(self._levels) if channel is None else [channel]
+            for c in channels:
+                self._detect.pop(c, None)
+                self._directions.pop(c, None)
+
+    def _dispatch(self):
+        while True:
+            channel, edge_time, callbacks = self._events.get()
+            self._event_times[channel] = edge_time
+            for callback in callbacks:
+                callback(channel)
+
+
+if __name__ == "__main__":
+    gpio = SimulatedGPIO()
+    gpio.setmode(BCM)
+    gpio.setup(17, IN)
+    gpio.add_event_detect(17, BOTH, callback=lambda ch: print(f"[EDGE] pin {ch} -> {gpio.input(ch)}"))
+    gpio.drive(17, HIGH)
+    time.sleep(0.1)
+    gpio.drive(17, LOW)
+    time.sleep(0.1)
@@ -0,0 +1,86 @@
+"""
+SimulatedSPI.py
+IX-Futakuchi-onna : spidev stand-in with a simulated MCP3008 ADC attached
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+Mimics the subset of spidev.SpiDev used by FieldResonanceDecoder (open, close, max_speed_hz,
+mode, xfer2). Each xfer2 call is one chip-select assertion, and the MCP3008 only starts a
+conversion on the falling edge of CS: the first 3-byte command frame of a transfer returns the
+next 10-bit conversion of the voltage fed to that channel, and any further bytes clocked in the
+same transfer read back the result LSB-first and then zeros, as on the real part. Transfers
+larger than spidev's default 4096-byte buffer are rejected. Conversions are produced as fast as
+the CPU allows (no wall-clock pacing).
+"""
+
+import threading
+
+import numpy as np
+
+
+SPIDEV_BUFSIZ = 4096  # spidev module default (bufsiz parameter)
+
+
+class SimulatedSpiDev:
+    def __init__(self, signals=None, vref=3.3):
+        """
+        signals: {channel: 1D array of volts}, each played in a loop, one sample per conversion
+        """
+        self.vref = vref
+        self.max_speed_hz = 0
+        self.mode = 0
+        self.bus = None
+        self.device = None
+        self.transfers = 0  # xfer2 calls served
+        self._signals = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        for channel, volts in (signals or {}).items():
+            self.feed(channel, volts)
+
+    def open(self, bus, device):
+        self.bus, self.device = bus, device
+
+    def close(self):
+        self.bus = self.device = None
+
+    def feed(self, channel, volts):
+        """
+        Replaces the voltage sequence on an ADC channel (clipped to 0..vref).
+        """
+        with self._lock:
+            self._signals[channel] = np.clip(np.asarray(volts, dtype=np.float64), 0.0, self.vref)
+            self._positions[channel] = 0
+
+    def xfer2(self, values, speed_hz=0, delay_usecs=0, bits_per_word=0):
+        values = list(values)
+        if len(values) > SPIDEV_BUFSIZ:
+            raise OverflowError(f"Argument list size exceeds {SPIDEV_BUFSIZ} bytes.")
+        if len(values) < 3:
+            raise ValueError("MCP3008 conversions need a whole 3-byte command frame")
+
+        # Single-ended command: start bit in byte 0, SGL/DIFF + channel in the top nibble of byte 1
+        if not values[0] & 1 or not values[1] & 0x80:
+            raise ValueError("Unsupported MCP3008 command frame")
+        channel = (values[1] >> 4) & 7
+
+        code = 0
+        with self._lock:
+            signal = self._signals.get(channel)
+            if signal is not None:
+                position = self._positions[channel]
+                code = int(np.rint(signal[position] / self.vref * 1023))
+                self._positions[channel] = (position + 1) % len(signal)
+            self.transfers += 1
+
+        # CS stays low past the first frame: the part shifts out B1..B9 LSB-first, then zeros
+        trailing = [(code >> bit) & 1 for bit in range(1, 10)]
+        trailing += [0] * (8 * (len(values) - 3) - len(trailing))
+        tail = np.packbits(np.array(trailing[:8 * (len(values) - 3)], dtype=np.uint8)).tolist()
+        return [0, (code >> 8) & 3, code & 0xFF] + tail
+
+if __name__ == "__main__":
+    spi = SimulatedSpiDev({0: [0.0, 1.65, 3.3]})
+    spi.open(0, 0)
+    print([spi.xfer2([1, 8 << 4, 0]) for _ in range(3)])  # One conversion per chip-select
@@ -0,0 +1,162 @@
+"""
+StageMetrics.py
+IX-Futakuchi-onna : Per-stage latency instrumentation for the harmonic transmission pipeline
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+Records wall time, CPU time, buffer size and outcome for every pipeline stage of every transmission.
+Completed transmission records are pushed to pluggable sinks (JSON lines, Prometheus text file)
+and folded into rolling p50/p95/p99 summaries per stage.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StageMetrics:
+    def __init__(self, sinks=(), window=1000):
+        """
+        sinks: objects with emit(record, metrics), called once per finished transmission
+        window: number of recent samples per stage kept for rolling percentiles
+        """
+        self.sinks = list(sinks)
+        self.window = window
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self._wall = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals = defaultdict(lambda: [0, 0.0])  # stage -> [count, wall seconds sum]
+        self._outcomes = defaultdict(int)
+
+    def begin(self, source=None):
+        """
+        Starts a transmission record. The record is passed explicitly to stage() and finish(),
+        so it can be handed between threads (e.g. begun by a producer, finished by a consumer).
+        """
+        record = {
+            "transmission_id": next(self._ids),
+            "source": str(source) if source is not None else None,
+            "started_at": time.time(),
+            "stages": [],
+            "outcome": None,
+            "wall_seconds": None,
+        }
+        record["_start"] = time.perf_counter()
+        return record
+
+    @contextmanager
+    def stage(self, record, name):
+        """
+        Times one stage. Yields a dict the caller may fill with "bytes" (buffer size).
+        Stage outcome is "ok", or "error" if the block raises.
+        """
+        entry = {"stage": name, "wall_seconds": None, "cpu_seconds": None, "bytes": None, "outcome": "ok"}
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield entry
+        except BaseException:
+            entry["outcome"] = "error"
+            raise
+        finally:
+            entry["wall_seconds"] = time.perf_counter() - wall_start
+            entry["cpu_seconds"] = time.thread_time() - cpu_start
+            if record is not None:
+                record["stages"].append(entry)
+
+    def finish(self, record, outcome):
+        """
+        Closes a transmission record, updates rolling summaries and pushes it to every sink.
+        """
+        record["outcome"] = outcome
+        record["wall_seconds"] = time.perf_counter() - record.pop("_start")
+
+        with self._lock:
+            for entry in record["stages"]:
+                self._wall[entry["stage"]].append(entry["wall_seconds"])
+                totals = self._totals[entry["stage"]]
+                totals[0] += 1
+                totals[1] += entry["wall_seconds"]
+            self._outcomes[outcome] += 1
+
+        for sink in self.sinks:
+            sink.emit(record, self)
+        return record
+
+    def summary(self):
+        """
+        Rolling wall-time percentiles per stage over the last `window` samples.
+        Returns {stage: {"p50", "p95", "p99", "count", "sum"}}.
+        """
+        with self._lock:
+            snapshot = {stage: (np.array(values), tuple(self._totals[stage]))
+                        for stage, values in self._wall.items()}
+
+        summary = {}
+        for stage, (values, (count, total)) in snapshot.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[stage] = {"p50": p50, "p95": p95, "p99": p99, "count": count, "sum": total}
+        return summary
+
+    def outcomes(self):
+        with self._lock:
+            return dict(self._outcomes)
+
+
+class JsonLinesSink:
+    """
+    Appends one JSON object per finished transmission.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, record, metrics):
+        line = json.dumps(record)
+        with self._lock, open(self.path, "a") as f:
+            f.write(line + "\n")
+
+
+class PrometheusTextfileSink:
+    """
+    Rewrites a node_exporter textfile-collector file with rolling stage summaries.
+    The file is replaced atomically so scrapes never see a partial write.
+    """
+
+    def __init__(self, path, prefix="ix"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def emit(self, record, metrics):
+        name = f"{self.prefix}_stage_wall_seconds"
+        lines = [
+            f"# HELP {name} Rolling per-stage wall time of harmonic transmissions.",
+            f"# TYPE {name} summary",
+        ]
+        for stage, stats in sorted(metrics.summary().items()):
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                lines.append(f'{name}{{stage="{stage}",quantile="{quantile}"}} {stats[key]:.9f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats["sum"]:.9f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+
+        total = f"{self.prefix}_transmissions_total"
+        lines.append(f"# HELP {total} Finished transmissions by outcome.")
+        lines.append(f"# TYPE {total} counter")
+        for outcome, count in sorted(metrics.outcomes().items()):
+            lines.append(f'{total}{{outcome="{outcome}"}} {count}')
+
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, self.path)
@@ -11,40 +11,55 @@ Supports future Gankyil-phase harmonic lithography modes.
 """
 
 import numpy as np
+from OscillatorBank import OscillatorBank
 
 class TeslaSignalEncoderV2:
     def __init__(self, sample_rate=44100, duration=1.0):
         self.sample_rate = sample_rate
         self.duration = duration
-        self.time = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
+        self.num_samples = int(sample_rate * duration)
 
         # Tesla-style frequency set (Hz)
         self.base_freq = 111  # Fundamental (can modulate this)
         self.harmonics = [3, 6, 9, 12]  # Multiplier harmonics for encoding layers
 
+    @property
+    def time(self):
+        """
+        Time axis, built on demand rather than kept resident.
+        """
+        return np.linspace(0, self.duration, self.num_samples, endpoint=False)
+
+    def _bank(self):
+        freqs = [self.base_freq * h for h in self.harmonics]
+        amplitudes = [1.0 / h for h in self.harmonics]  # Normalize power
+        return OscillatorBank(freqs, amplitudes, sample_rate=self.sample_rate)
+
     def generate_signal(self, phase_shift=0.0):
         """
         Combines multiple harmonics into a single encoded waveform.
         """
-        waveform = np.zeros_like(self.time)
-        for h in self.harmonics:
-            harmonic_freq = self.base_freq * h
-            amplitude = 1.0 / h  # Normalize power
-            waveform += amplitude * np.sin(2 * np.pi * harmonic_freq * self.time + phase_shift)
+        waveform = self._bank().render_rotations([phase_shift], self.num_samples)[0]
 
         # Normalize to prevent clipping
         waveform /= np.max(np.abs(waveform))
         return waveform
 
-    def generate_gankyil_triple(self):
+    def generate_gankyil_triple(self, out=None, dtype=np.float64):
         """
         Generates three overlapping signals for Gankyil triple-loop encoding.
+        The harmonic phasors are computed once and rotated by 0°, 120° and 240° in a single pass.
+
+        out: optional caller-supplied (3, N) buffer (e.g. float32) to render into
         """
-        return {
-            'X': self.generate_signal(phase_shift=0.0),
-            'Y': self.generate_signal(phase_shift=2 * np.pi / 3),
-            'Z': self.generate_signal(phase_shift=4 * np.pi / 3),
-        }
+        rotations = [0.0, 2 * np.pi / 3, 4 * np.pi / 3]
+        triple = self._bank().render_rotations(rotations, self.num_samples, out=out, dtype=dtype)
+
+        # Normalize each phase to prevent clipping
+        for row in triple:
+            row /= max(row.max(), -row.min())
+
+        return {'X': triple[0], 'Y': triple[1], 'Z': triple[2]}
 
 if __name__ == "__main__":
     encoder = TeslaSignalEncoderV2()
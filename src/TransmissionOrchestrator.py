@@ -21,7 +21,18 @@ from FieldModulator import FieldModulator
 from SignalObfuscator import SignalObfuscator
 from BeamEmitterController import BeamEmitterController
 from FeedbackLockMonitor import FeedbackLockMonitor
-import soundfile as sf
+from AudioBackend import NullOutputStream
+from StageMetrics import StageMetrics
+import numpy as np
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
 
 
 class TransmissionOrchestrator:
@@ -29,50 +40,300 @@ class TransmissionOrchestrator:
                  base_freq=111,
                  encryption_key="IX369",
                  noise_key="OBF-369",
-                 sample_rate=44100):
+                 sample_rate=44100,
+                 metrics=None,
+                 backend=None,
+                 dtype=np.float64):
+        """
+        metrics: StageMetrics instance receiving per-stage timings for every transmission
+                 (a sink-less one is created by default, so summaries are always available)
+        backend: audio backend shared by emitter and lock monitor (see AudioBackend.py),
+                 e.g. SimulatedChannel for faster-than-real-time end-to-end runs
+        dtype: sample precision used by every stage. np.float32 keeps WAV input, FFTs (complex64),
+               the synthesized waveform, masking noise and handshake capture in single precision,
+               which is ample for 16/24-bit DACs and halves memory traffic.
+        """
         self.base_freq = base_freq
-        self.encoder = HarmonicEncoder(sample_rate=sample_rate)
+        self.dtype = np.dtype(dtype)
+        self.encoder = HarmonicEncoder(sample_rate=sample_rate, dtype=dtype)
         self.encryptor = HarmonicEncryptor(encryption_key=encryption_key)
-        self.modulator = FieldModulator(base_freq=base_freq, sample_rate=sample_rate)
-        self.obfuscator = SignalObfuscator(noise_key=noise_key)
-        self.emitter = BeamEmitterController(sample_rate=sample_rate)
-        self.lock_monitor = FeedbackLockMonitor(sample_rate=sample_rate)
+        self.modulator = FieldModulator(base_freq=base_freq, sample_rate=sample_rate, dtype=dtype)
+        self.obfuscator = SignalObfuscator(noise_key=noise_key, dtype=dtype)
+        self.emitter = BeamEmitterController(sample_rate=sample_rate, backend=backend)
+        self.lock_monitor = FeedbackLockMonitor(sample_rate=sample_rate, backend=backend, dtype=dtype)
         self.sample_rate = sample_rate
+        self.metrics = metrics or StageMetrics()
+
+    def transmit(self, wav_path, secure=True, require_lock=True, stream=False):
+        """
+        stream: encode with block-read Welch frames instead of loading the whole file,
+                keeping memory bounded for long recordings.
+        """
+        record = self.metrics.begin(wav_path)
+        try:
+            obfuscated = self._prepare(wav_path, secure=secure, stream=stream, record=record)
+
+            if require_lock:
+                logger.info("[STEP 5] Waiting for harmonic feedback...")
+                with self.metrics.stage(record, "handshake"):
+                    locked = self.lock_monitor.listen_for_feedback(base_freq=self.base_freq)
+                if not locked:
+                    logger.warning("[ABORTED] No valid field handshake received.")
+                    self.metrics.finish(record, "aborted")
+                    return
+                else:
+                    logger.info("[CONFIRMED] Feedback lock achieved.")
+
+            self._emit(obfuscated, record)
+        except Exception:
+            self.metrics.finish(record, "error")
+            raise
+        self.metrics.finish(record, "emitted")
+
+    def transmit_concurrent(self, wav_path, secure=True, stream=False, abort=None):
+        """
+        Pipelined transmit: the handshake listen starts immediately while the waveform is
+        prepared on a worker thread, so time-to-emit is max(prepare, listen) instead of their sum.
+        Emits as soon as lock is confirmed and preparation is done.
+
+        abort: optional threading.Event; setting it at any point before emission cancels
+               preparation at the next stage boundary, ends the handshake listen within one hop
+               and skips emission. A failed handshake cancels preparation the same way.
+        Returns True if the signal was emitted.
+        """
+        cancel = threading.Event()
+        record = self.metrics.begin(wav_path)
+
+        def aborted():
+            return abort is not None and abort.is_set()
+
+        try:
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                preparation = pool.submit(self._prepare, wav_path, secure, stream, cancel, record, abort)
+
+                logger.info("[STEP 5] Waiting for harmonic feedback (preparing in parallel)...")
+                with self.metrics.stage(record, "handshake"):
+                    locked = self.lock_monitor.listen_streaming(base_freq=self.base_freq, stop=abort) == "locked"
+
+                if not locked or aborted():
+                    cancel.set()
+                    preparation.cancel()
+                    logger.warning("[ABORTED] Transmission aborted by caller." if aborted()
+                                   else "[ABORTED] No valid field handshake received.")
+                else:
+                    logger.info("[CONFIRMED] Feedback lock achieved.")
+                    obfuscated = preparation.result()
+
+            # The pool has joined here, so the preparation worker no longer appends stages to record
+            if cancel.is_set():
+                self.metrics.finish(record, "aborted")
+                return False
+
+            if obfuscated is None or aborted():
+                logger.warning("[ABORTED] Preparation cancelled.")
+                self.metrics.finish(record, "cancelled")
+                return False
+
+            self._emit(obfuscated, record)
+        except Exception:
+            self.metrics.finish(record, "error")
+            raise
+
+        self.metrics.finish(record, "emitted")
+        return True
+
+    def transmit_batch(self, sources, secure=True, require_lock=True, workers=2, prefetch=4, headless=False):
+        """
+        Pipelined batch transmission.
+        CPU stages (encode/encrypt/modulate/obfuscate) run on a worker pool up to `prefetch` jobs
+        ahead of a single emitter consumer, which emits in submission order through the gapless
+        output stream.
+
+        sources: list of WAV paths, a directory of WAVs, a single WAV path, or a queue.Queue of paths
+                 ended by None. An error while reading sources (e.g. a missing path) is raised to the
+                 caller once the jobs already queued have finished.
+        headless: emit into an unpaced NullOutputStream instead of the sound card (throughput testing;
+                  usually combined with require_lock=False)
+        Returns:
+            list of per-job dicts: path, ok, emitted, prepare_seconds, emit_seconds, error
+            (emitted is set once the batch has drained, i.e. after the buffer actually played)
+        """
+        if headless:
+            emitter = BeamEmitterController(sample_rate=self.sample_rate,
+                                            stream_factory=functools.partial(NullOutputStream, paced=False))
+        else:
+            emitter = self.emitter
+
+        slots = threading.Semaphore(prefetch)
+        jobs = queue.Queue()
+        results = []
+        queued = []  # Results whose buffer is in the output stream but not yet confirmed played
+
+        def timed_prepare(path, record):
+            start = time.perf_counter()
+            waveform = self._prepare(path, secure=secure, record=record)
+            return waveform, time.perf_counter() - start
 
-    def transmit(self, wav_path, secure=True, require_lock=True):
-        print(f"[START] Loading waveform: {wav_path}")
-        waveform, sr = sf.read(wav_path)
-        assert sr == self.sample_rate, "[ERROR] Sample rate mismatch."
+        producer_error = []
 
-        print("[STEP 1] Encoding harmonics...")
-        harmonic_vector = self.encoder.encode(waveform)
+        def produce(pool):
+            try:
+                for path in _iter_sources(sources):
+                    slots.acquire()
+                    record = self.metrics.begin(path)
+                    jobs.put((path, record, pool.submit(timed_prepare, path, record)))
+            except BaseException as e:
+                producer_error.append(e)
+            finally:
+                jobs.put(None)
 
-        print("[STEP 2] Encrypting harmonic vector...")
-        encrypted = self.encryptor.encrypt(harmonic_vector, base_freq=self.base_freq)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            producer = threading.Thread(target=produce, args=(pool,), daemon=True)
+            producer.start()
 
-        print("[STEP 3] Modulating encrypted vector...")
-        encrypted_dict = self.encryptor.decrypt(encrypted, base_freq=self.base_freq)
-        modulated = self.modulator.modulate(encrypted_dict)
+            while True:
+                job = jobs.get()
+                if job is None:
+                    break
+                path, record, future = job
+                result = {"path": path, "ok": False, "emitted": False,
+                          "prepare_seconds": None, "emit_seconds": None, "error": None}
+                outcome = "error"
+                try:
+                    waveform, result["prepare_seconds"] = future.result()
+
+                    start = time.perf_counter()
+                    locked = True
+                    if require_lock:
+                        with self.metrics.stage(record, "handshake"):
+                            locked = self.lock_monitor.listen_streaming(base_freq=self.base_freq) == "locked"
+
+                    if not locked:
+                        result["error"] = "No valid field handshake received."
+                        outcome = "aborted"
+                    else:
+                        with self.metrics.stage(record, "playback") as entry:
+                            buffer = emitter.prepare(waveform)
+                            entry["bytes"] = buffer.nbytes
+                            emitter.enqueue(buffer)
+                        queued.append(result)
+                        result["ok"] = True
+                        outcome = "emitted"
+                    result["emit_seconds"] = time.perf_counter() - start
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                finally:
+                    slots.release()
+                    self.metrics.finish(record, outcome)
+                results.append(result)
+
+            producer.join()
+
+        if emitter.drain():
+            for result in queued:
+                result["emitted"] = True
+        if headless:
+            emitter.stop_stream()
+
+        if producer_error:
+            # Jobs already queued were still emitted; the source error is the caller's to handle
+            raise producer_error[0]
+
+        sent = sum(1 for r in results if r["emitted"])
+        logger.info(f"[COMPLETE] Batch finished: {sent}/{len(results)} signals emitted.")
+        return results
+
+    def _emit(self, waveform, record):
+        logger.info("[STEP 6] Emitting signal...")
+        with self.metrics.stage(record, "playback") as entry:
+            entry["bytes"] = waveform.nbytes
+            self.emitter.emit_waveform(waveform)
+        logger.info("[COMPLETE] Signal emission complete.")
+
+    def _prepare(self, wav_path, secure=True, stream=False, cancel=None, record=None, abort=None):
+        """
+        Load, encode, encrypt, modulate and (optionally) obfuscate.
+        Returns the waveform to emit, or None if cancel or abort was set between stages.
+        """
+        def cancelled():
+            return any(event is not None and event.is_set() for event in (cancel, abort))
+
+        stage = self.metrics.stage
+
+        if stream:
+            logger.info(f"[START] Streaming waveform: {wav_path}")
+            logger.info("[STEP 1] Encoding harmonics (streamed)...")
+            with stage(record, "encode"):
+                harmonic_vector = self.encoder.encode_stream(wav_path)
+        else:
+            from WaveIO import open_wave
+
+            logger.info(f"[START] Loading waveform: {wav_path}")
+            with open_wave(wav_path) as source:
+                with stage(record, "wav_io") as entry:
+                    # Memory-mapped; a zero-copy view when the file already stores self.dtype
+                    waveform = source.read(channel=0, dtype=self.dtype)
+                    entry["bytes"] = waveform.nbytes
+                assert source.sample_rate == self.sample_rate, "[ERROR] Sample rate mismatch."
+                if cancelled():
+                    return None
+
+                logger.info("[STEP 1] Encoding harmonics...")
+                with stage(record, "encode"):
+                    harmonic_vector = self.encoder.encode(waveform)
+                del waveform  # Last view of the mapping: it is unmapped before synthesis
+        if cancelled():
+            return None
+
+        logger.info("[STEP 2] Encrypting harmonic vector...")
+        with stage(record, "encrypt"):
+            encrypted = self.encryptor.encrypt(harmonic_vector, base_freq=self.base_freq)
+        if cancelled():
+            return None
+
+        logger.info("[STEP 3] Modulating encrypted vector...")
+        with stage(record, "modulate") as entry:
+            modulated = self.modulator.modulate_frequencies(encrypted)
+            entry["bytes"] = modulated.nbytes
+        if cancelled():
+            return None
 
         if secure:
-            print("[STEP 4] Applying signal obfuscation...")
-            obfuscated, _ = self.obfuscator.apply_noise(modulated)
+            logger.info("[STEP 4] Applying signal obfuscation...")
+            with stage(record, "obfuscate") as entry:
+                obfuscated, _ = self.obfuscator.apply_noise(modulated)
+                entry["bytes"] = obfuscated.nbytes
         else:
             obfuscated = modulated
 
-        if require_lock:
-            print("[STEP 5] Waiting for harmonic feedback...")
-            if not self.lock_monitor.listen_for_feedback(base_freq=self.base_freq):
-                print("[ABORTED] No valid field handshake received.")
-                return
-            else:
-                print("[CONFIRMED] Feedback lock achieved.")
+        return obfuscated
+
 
-        print("[STEP 6] Emitting signal...")
-        self.emitter.emit_waveform(obfuscated)
-        print("[COMPLETE] Signal emission complete.")
+def _iter_sources(sources):
+    """
+    Yields WAV paths from a list, a directory, a single file path, or a queue terminated by None.
+    """
+    if isinstance(sources, queue.Queue):
+        while True:
+            path = sources.get()
+            if path is None:
+                return
+            yield path
+    elif isinstance(sources, (str, bytes, os.PathLike)):
+        sources = os.fsdecode(sources)
+        if os.path.isdir(sources):
+            for name in sorted(os.listdir(sources)):
+                if name.lower().endswith(".wav"):
+                    yield os.path.join(sources, name)
+        elif os.path.isfile(sources):
+            yield sources
+        else:
+            raise FileNotFoundError(f"No such WAV file or directory: {sources}")
+    else:
+        yield from sources
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     orchestrator = TransmissionOrchestrator()
     orchestrator.transmit("test_hello.wav", secure=True, require_lock=True)
@@ -0,0 +1,355 @@
+"""
+WaveIO.py
+IX-Futakuchi-onna : Shared zero-copy waveform I/O for the harmonic transmission pipeline
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+Opens WAV (RIFF/RF64) and headerless RAW captures as read-only memory maps in their native sample
+dtype, so stages receive array views instead of fully decoded float64 copies. Pages are faulted
+in on access and served from the OS page cache on repeated runs, so multi-gigabyte captures
+process block by block with constant resident memory. Formats that cannot be mapped (24-bit PCM,
+FLAC, ...) fall back to block streaming through soundfile, imported only in that case.
+WaveWriter appends blocks to a WAV file incrementally and patches the header on close.
+"""
+
+import mmap
+import os
+import struct
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# (format tag, bits per sample) -> native dtype that can be mapped directly
+_MAPPABLE = {
+    (WAVE_FORMAT_PCM, 8): np.dtype('u1'),
+    (WAVE_FORMAT_PCM, 16): np.dtype('<i2'),
+    (WAVE_FORMAT_PCM, 32): np.dtype('<i4'),
+    (WAVE_FORMAT_IEEE_FLOAT, 32): np.dtype('<f4'),
+    (WAVE_FORMAT_IEEE_FLOAT, 64): np.dtype('<f8'),
+}
+
+# Consumed mapped pages are handed back to the OS every this many bytes while streaming blocks
+RELEASE_BYTES = 16 << 20
+
+# soundfile subtype -> dtype to stream in when the file cannot be mapped
+_STREAM_DTYPES = {'PCM_16': 'int16', 'PCM_24': 'int32', 'PCM_32': 'int32', 'FLOAT': 'float32', 'DOUBLE': 'float64'}
+
+
+def _scale_and_offset(dtype):
+    """
+    Factor and offset mapping native samples to [-1, 1), matching soundfile's float conversion.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'u':
+        return 1.0 / (1 << (8 * dtype.itemsize - 1)), float(1 << (8 * dtype.itemsize - 1))
+    if dtype.kind == 'i':
+        return 1.0 / (1 << (8 * dtype.itemsize - 1)), 0.0
+    return 1.0, 0.0
+
+
+class WaveSource:
+    """
+    A waveform opened for reading. Use open_wave() or open_raw() to construct.
+
+    data: (frames, channels) memmap in the native dtype, or None when block streaming
+    scale, offset: native -> float conversion, float = (native - offset) * scale
+    """
+
+    def __init__(self, path, sample_rate, channels, frames, dtype, data=None):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = frames
+        self.dtype = np.dtype(dtype)
+        self.data = data
+        self.scale, self.offset = _scale_and_offset(self.dtype)
+
+    @property
+    def mapped(self):
+        return self.data is not None
+
+    def __len__(self):
+        return self.frames
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Drops this source's mapping; it is unmapped once no views handed out remain.
+        """
+        self.data = None
+
+    def channel(self, index=0):
+        """
+        Zero-copy 1D view of one channel in the native dtype (mapped sources only).
+        """
+        if not self.mapped:
+            raise ValueError(f"{self.path} is block-streamed; use blocks() or read()")
+        return self.data[:, index]
+
+    def read(self, channel=0, dtype=None):
+        """
+        One channel as a 1D array.
+        dtype None returns native samples; a float dtype returns samples scaled to [-1, 1).
+        Mapped sources whose native dtype already matches are returned as a zero-copy view.
+        """
+        if self.mapped:
+            return self.to_float(self.channel(channel), dtype)
+
+        import soundfile as sf
+        samples, _ = sf.read(self.path, dtype=self.dtype.name, always_2d=True)
+        return self.to_float(samples[:, channel], dtype)
+
+    def blocks(self, block_size, overlap=0, channel=0, dtype=None, fill_value=None):
+        """
+        Yields consecutive blocks of block_size samples from one channel, each sharing `overlap`
+        samples with the previous block. Mapped sources yield zero-copy views when dtype is None
+        or matches the native dtype. fill_value zero-pads the final partial block; without it the
+        final block is shorter. An empty file yields no blocks.
+        """
+        hop = block_size - overlap
+        if hop <= 0:
+            raise ValueError("overlap must be smaller than block_size")
+        if self.frames == 0:
+            return
+
+        if not self.mapped:
+            yield from self._stream_blocks(block_size, overlap, channel, dtype, fill_value)
+            return
+
+        samples = self.channel(channel)
+        released = 0
+        release_frames = max(RELEASE_BYTES // (self.dtype.itemsize * self.channels), 1)
+        for start in range(0, max(self.frames - overlap, 1), hop):
+            block = self.to_float(samples[start:start + block_size], dtype)
+            if fill_value is not None and len(block) < block_size:
+                block = np.concatenate([block, np.full(block_size - len(block), fill_value, dtype=block.dtype)])
+            yield block
+
+            if start - released >= release_frames:
+                self.release(released, start)
+                released = start
+
+    def release(self, start, stop):
+        """
+        Drops resident pages for frames [start, stop) of a mapped source so streaming a large file
+        keeps resident memory flat. Data stays valid: pages fault back in from the page cache.
+        """
+        mm = getattr(self.data, '_mmap', None)
+        if mm is None or not hasattr(mm, 'madvise'):
+            return
+        frame_bytes = self.dtype.itemsize * self.channels
+        base = self.data.offset % mmap.ALLOCATIONGRANULARITY  # Start of frame 0 within the mapping
+        lo = -(-(base + start * frame_bytes) // mmap.PAGESIZE) * mmap.PAGESIZE
+        hi = (base + stop * frame_bytes) // mmap.PAGESIZE * mmap.PAGESIZE
+        if hi > lo:
+            mm.madvise(mmap.MADV_DONTNEED, lo, hi - lo)
+
+    def _stream_blocks(self, block_size, overlap, channel, dtype, fill_value):
+        import soundfile as sf
+        for block in sf.blocks(self.path, blocksize=block_size, overlap=overlap, dtype=self.dtype.name,
+                               always_2d=True, fill_value=fill_value):
+            yield self.to_float(block[:, channel], dtype)
+
+    def to_float(self, samples, dtype):
+        """
+        Converts native samples to dtype, scaling integers to [-1, 1). No copy when dtype matches.
+        """
+        if dtype is None or np.dtype(dtype) == samples.dtype:
+            return samples
+        if self.dtype.kind == 'f':
+            return samples.astype(dtype)
+        converted = samples.astype(dtype)
+        if self.offset:
+            converted -= self.offset
+        converted *= self.scale
+        return converted
+
+
+def open_wave(path, sample_rate=None, dtype=None, channels=1, offset=0):
+    """
+    Opens a WAV file memory-mapped, or any other soundfile format block-streamed.
+    Paths ending in .raw/.pcm/.bin are headerless captures and need sample_rate and dtype
+    (channels and byte offset optional).
+    sample_rate, if given for a WAV, is checked against the header.
+    """
+    if os.path.splitext(str(path))[1].lower() in ('.raw', '.pcm', '.bin'):
+        if sample_rate is None or dtype is None:
+            raise ValueError("RAW captures need sample_rate and dtype")
+        return open_raw(path, sample_rate, dtype, channels=channels, offset=offset)
+
+    header = _parse_wav_header(path)
+    if header is not None and header[2] is not None:
+        rate, num_channels, native, data_offset, frames = header
+        data = _map(path, native, data_offset, frames, num_channels)
+        source = WaveSource(path, rate, num_channels, frames, native, data)
+    else:
+        source = _soundfile_source(path)
+
+    if sample_rate is not None and source.sample_rate != sample_rate:
+        raise ValueError(f"Sample rate mismatch: expected {sample_rate}, got {source.sample_rate}")
+    return source
+
+
+def open_raw(path, sample_rate, dtype, channels=1, offset=0):
+    """
+    Memory-maps a headerless capture of interleaved samples in the given dtype.
+    """
+    dtype = np.dtype(dtype)
+    frames = (os.path.getsize(path) - offset) // (dtype.itemsize * channels)
+    return WaveSource(path, sample_rate, channels, frames, dtype, _map(path, dtype, offset, frames, channels))
+
+
+def _map(path, dtype, offset, frames, channels):
+    if frames == 0:
+        return np.empty((0, channels), dtype=dtype)  # mmap cannot map an empty range
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(frames, channels))
+
+
+def _soundfile_source(path):
+    import soundfile as sf
+    info = sf.info(path)
+    return WaveSource(path, info.samplerate, info.channels, info.frames,
+                      _STREAM_DTYPES.get(info.subtype, 'float64'))
+
+
+def _parse_wav_header(path):
+    """
+    Returns (sample_rate, channels, native dtype or None, data offset, frames),
+    or None if the file is not RIFF/RF64 WAVE.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] not in (b'RIFF', b'RF64') or riff[8:12] != b'WAVE':
+            return None
+
+        fmt = None
+        ds64_data_size = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, size = struct.unpack('<4sI', chunk)
+
+            if chunk_id == b'ds64':
+                _, ds64_data_size, _ = struct.unpack('<QQQ', f.read(24))
+                f.seek(size - 24 + (size & 1), os.SEEK_CUR)
+            elif chunk_id == b'fmt ':
+                body = f.read(size)
+                tag, channels, rate, _, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+                if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    tag = struct.unpack('<H', body[24:26])[0]  # First two bytes of the SubFormat GUID
+                fmt = (tag, channels, rate, block_align, bits)
+                if size & 1:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    return None
+                if size == 0xFFFFFFFF and ds64_data_size is not None:
+                    size = ds64_data_size
+                tag, channels, rate, block_align, bits = fmt
+                data_offset = f.tell()
+                frames = min(size, file_size - data_offset) // block_align
+                native = _MAPPABLE.get((tag, bits))
+                if native is not None and native.itemsize * channels != block_align:
+                    native = None
+                return rate, channels, native, data_offset, frames
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+class WaveWriter:
+    """
+    Incremental WAV writer. Blocks are appended as they arrive and the header sizes are patched
+    on close, so outputs never need to be held in memory. Files past 4 GiB are upgraded to RF64.
+
+    dtype: stored sample type (float32, float64, int16, int32 or uint8).
+           Float blocks written to an integer file are clipped to [-1, 1) and scaled.
+    """
+
+    def __init__(self, path, sample_rate, channels=1, dtype=np.float32):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.scale, self.offset = _scale_and_offset(self.dtype)
+        self.frames = 0
+
+        tag = WAVE_FORMAT_IEEE_FLOAT if self.dtype.kind == 'f' else WAVE_FORMAT_PCM
+        if (tag, self.dtype.itemsize * 8) not in _MAPPABLE:
+            raise ValueError(f"Unsupported WAV sample dtype: {self.dtype}")
+
+        block_align = self.dtype.itemsize * channels
+        self._file = open(path, 'wb')
+        self._file.write(b'RIFF\x00\x00\x00\x00WAVE')
+        self._file.write(b'JUNK' + struct.pack('<I', 28) + bytes(28))  # Reserved for a ds64 chunk
+        self._file.write(b'fmt ' + struct.pack('<IHHIIHH', 16, tag, channels, sample_rate,
+                                               sample_rate * block_align, block_align, self.dtype.itemsize * 8))
+        self._file.write(b'data\x00\x00\x00\x00')
+        self._data_offset = self._file.tell()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, block):
+        """
+        Appends a block shaped (frames,) or (frames, channels).
+        """
+        block = np.asarray(block)
+        if block.dtype.kind == 'f' and self.dtype.kind in 'iu':
+            limit = 1.0 - self.scale
+            block = np.clip(block, -1.0, limit) / self.scale + self.offset
+            block = np.rint(block)
+        self._file.write(np.ascontiguousarray(block, dtype=self.dtype).tobytes())
+        self.frames += block.shape[0]
+
+    def close(self):
+        if self._file is None:
+            return
+        data_size = self.frames * self.dtype.itemsize * self.channels
+        if data_size & 1:
+            self._file.write(b'\x00')
+        riff_size = self._file.tell() - 8
+
+        if riff_size > 0xFFFFFFFF:
+            self._file.seek(0)
+            self._file.write(b'RF64' + struct.pack('<I', 0xFFFFFFFF))
+            self._file.seek(12)
+            self._file.write(b'ds64' + struct.pack('<IQQQI', 28, riff_size, data_size, self.frames, 0))
+            data_size_field = 0xFFFFFFFF
+        else:
+            self._file.seek(4)
+            self._file.write(struct.pack('<I', riff_size))
+            data_size_field = data_size
+
+        self._file.seek(self._data_offset - 4)
+        self._file.write(struct.pack('<I', data_size_field))
+        self._file.close()
+        self._file = None
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # Usage: python WaveIO.py <capture.wav>   (streams the file block by block and reports RMS)
+    start = time.perf_counter()
+    with open_wave(sys.argv[1]) as source:
+        energy = 0.0
+        for block in source.blocks(1 << 16, dtype=np.float64):
+            energy += float(np.dot(block, block))
+        rms = np.sqrt(energy / max(source.frames, 1))
+    print(f"[OK] {source.frames} frames, {source.dtype}, mapped={source.mapped}, "
+          f"RMS {rms:.4f} in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,253 @@
+"""
+bench_PipelineStages.py
+IX-Futakuchi-onna : Headless per-stage benchmark suite with regression baselines
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+Times every stage of the harmonic transmission chain across a sweep of durations and sample rates,
+reporting throughput (samples/sec, or calls/sec for stages whose work does not scale with the signal
+length) and peak traced memory per stage. Results are compared against a stored JSON baseline; any stage
+slower than baseline by more than the threshold, failing, or missing from the run fails the run.
+
+Usage (with src/ on PYTHONPATH):
+    python test/bench_PipelineStages.py                     # compare against test/bench_baseline.json
+    python test/bench_PipelineStages.py --update-baseline   # record a new baseline
+    python test/bench_PipelineStages.py --quick --threshold 0.3
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from HarmonicEncoder import HarmonicEncoder
+from HarmonicEncryptor import HarmonicEncryptor
+from FieldModulator import FieldModulator
+from SignalObfuscator import SignalObfuscator
+from SignalObfuscator_v2 import SignalObfuscatorV2
+from FieldUnlockDecoder import FieldUnlockDecoder
+from GankyilPhaseValidator import GankyilPhaseValidator
+from TeslaSignalEncoder_v2 import TeslaSignalEncoderV2
+
+BASE_FREQ = 111
+HARMONIC_VECTOR = {3: 0.9, 6: 0.6, 9: 0.4}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# Stages operating on the fixed-length harmonic vector: throughput is reported per call
+PER_CALL_STAGES = {"HarmonicEncryptor.encrypt+decrypt"}
+
+
+def make_input(sample_rate, duration):
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    rng = np.random.default_rng(369)
+    return 0.5 * np.sin(2 * np.pi * BASE_FREQ * t) + 0.05 * rng.standard_normal(len(t))
+
+
+def build_stages(sample_rate, duration, workdir):
+    """
+    Returns {stage_name: (setup, run)} where setup() builds inputs outside the timed region.
+    """
+    n = int(sample_rate * duration)
+
+    def encode():
+        encoder = HarmonicEncoder(sample_rate=sample_rate)
+        waveform = make_input(sample_rate, duration)
+        return lambda: encoder.encode(waveform)
+
+    def modulate():
+        modulator = FieldModulator(base_freq=BASE_FREQ, sample_rate=sample_rate, duration=duration)
+        return lambda: modulator.modulate(HARMONIC_VECTOR)
+
+    def encrypt():
+        encryptor = HarmonicEncryptor()
+        return lambda: encryptor.decrypt(encryptor.encrypt(HARMONIC_VECTOR, BASE_FREQ), BASE_FREQ)
+
+    def obfuscate_v1():
+        obfuscator = SignalObfuscator()
+        waveform = make_input(sample_rate, duration)
+        return lambda: obfuscator.apply_noise(waveform)
+
+    def obfuscate_v2():
+        obfuscator = SignalObfuscatorV2(seed=42)
+        waveform = make_input(sample_rate, duration)
+        return lambda: obfuscator.obfuscate(waveform)
+
+    def decode():
+        signal = SignalObfuscatorV2(seed=42).obfuscate(make_input(sample_rate, duration))
+        decoder = FieldUnlockDecoder(known_seed=42)
+        return lambda: decoder.decode(signal)
+
+    def gankyil():
+        encoder = TeslaSignalEncoderV2(sample_rate=sample_rate, duration=duration)
+        triple = encoder.generate_gankyil_triple()
+        validator = GankyilPhaseValidator(triple['X'], triple['Y'], triple['Z'], sample_rate=sample_rate)
+        return lambda: validator.validate()
+
+    def end_to_end():
+        import soundfile as sf
+        from TransmissionOrchestrator import TransmissionOrchestrator
+
+        wav_path = os.path.join(workdir, f"bench_{sample_rate}_{duration}.wav")
+        sf.write(wav_path, make_input(sample_rate, duration), sample_rate)
+        orchestrator = TransmissionOrchestrator(base_freq=BASE_FREQ, sample_rate=sample_rate)
+        orchestrator.modulator.duration = duration
+        return lambda: orchestrator.transmit_batch([wav_path], require_lock=False, headless=True)
+
+    stages = {
+        "HarmonicEncoder.encode": encode,
+        "FieldModulator.modulate": modulate,
+        "HarmonicEncryptor.encrypt+decrypt": encrypt,
+        "SignalObfuscator.apply_noise": obfuscate_v1,
+        "SignalObfuscatorV2.obfuscate": obfuscate_v2,
+        "FieldUnlockDecoder.decode": decode,
+        "GankyilPhaseValidator.validate": gankyil,
+        "TransmissionOrchestrator.end_to_end": end_to_end,
+    }
+    return n, stages
+
+
+def measure(run, repeats):
+    """
+    Best-of-N wall time, plus peak traced memory from one extra traced run.
+    Stage console output is swallowed so it doesn't skew timings.
+    """
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        run()  # Warm-up: caches, FFT plans, lazy imports
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return best, peak
+
+
+def run_suite(sample_rates, durations, repeats, only=None):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for sample_rate in sample_rates:
+            for duration in durations:
+                n, stages = build_stages(sample_rate, duration, workdir)
+                for name, setup in stages.items():
+                    if only and not any(o in name for o in only):
+                        continue
+                    key = f"{name}@{sample_rate}Hz@{duration}s"
+                    try:
+                        seconds, peak = measure(setup(), repeats)
+                    except Exception as e:
+                        results[key] = {"error": f"{type(e).__name__}: {e}"}
+                        print(f"  {key:<58} FAILED ({results[key]['error']})")
+                        continue
+
+                    results[key] = {"seconds": seconds, "peak_mem_mb": peak / 1e6}
+                    if name in PER_CALL_STAGES:
+                        results[key]["calls_per_sec"] = 1 / seconds
+                        rate = f"{1 / seconds / 1e3:10.2f} kcalls/s  "
+                    else:
+                        results[key]["samples_per_sec"] = n / seconds
+                        rate = f"{n / seconds / 1e6:10.2f} Msamples/s"
+                    print(f"  {key:<58} {rate} {seconds * 1000:9.2f} ms {peak / 1e6:9.2f} MB")
+    return results
+
+
+def compare(results, baseline, threshold, selected=None):
+    """
+    Returns the list of stage keys whose throughput dropped more than threshold below baseline,
+    plus baseline stages that failed or are missing from the results.
+    selected(key): whether a baseline key was part of this run (filtered-out keys are not missing)
+    """
+    regressions = []
+    for key, reference in baseline.items():
+        current = results.get(key)
+        if current is None:
+            if selected is None or selected(key):
+                regressions.append(key)
+                print(f"[REGRESSION] {key}: missing from this run")
+            continue
+        if "error" in current:
+            regressions.append(key)
+            print(f"[REGRESSION] {key}: failed ({current['error']})")
+            continue
+
+        metric = "calls_per_sec" if "calls_per_sec" in reference else "samples_per_sec"
+        if metric not in current:
+            regressions.append(key)
+            print(f"[REGRESSION] {key}: {metric} not measured")
+            continue
+        ratio = current[metric] / reference[metric]
+        if ratio < 1.0 - threshold:
+            regressions.append(key)
+            print(f"[REGRESSION] {key}: {ratio:.2f}x of baseline throughput")
+    return regressions
+
+
+def selection(sample_rates, durations, only):
+    """
+    Predicate telling whether a result key belongs to the given sweep and stage filter.
+    """
+    def selected(key):
+        name, rate, duration = key.rsplit("@", 2)
+        return (int(rate[:-2]) in sample_rates and float(duration[:-1]) in durations
+                and (not only or any(o in name for o in only)))
+    return selected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage pipeline benchmark")
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=[22050, 44100, 96000])
+    parser.add_argument("--durations", type=float, nargs="+", default=[0.5, 2.0, 10.0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="Run only stages whose name contains one of these")
+    parser.add_argument("--quick", action="store_true", help="Single sample rate and short durations")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed fractional throughput drop before failing")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.sample_rates, args.durations, args.repeats = [44100], [0.5, 2.0], 3
+
+    print("[BENCH] Pipeline stage throughput")
+    results = run_suite(args.sample_rates, args.durations, args.repeats, args.only)
+
+    failed = sorted(key for key, result in results.items() if "error" in result)
+    if args.update_baseline or not os.path.exists(args.baseline):
+        if failed:
+            print(f"[FAIL] Not writing a baseline: {len(failed)} stage(s) failed")
+            return 1
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"[BENCH] Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold,
+                          selection(args.sample_rates, args.durations, args.only))
+    regressions += [key for key in failed if key not in baseline]  # New stages that fail
+    if regressions:
+        print(f"[FAIL] {len(regressions)} stage(s) regressed beyond {args.threshold:.0%}")
+        return 1
+
+    print("[PASS] No stage regressed beyond threshold.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+sim_ConcurrentAbort.py
+IX-Futakuchi-onna : Verifies that a caller abort stops a pipelined transmission before emission
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+Drives TransmissionOrchestrator.transmit_concurrent over simulated channels and sets the caller's
+abort Event at two points: in the middle of the handshake listen (the paired receiver never answers,
+so only the abort can end the listen early), and after lock while the waveform is still being prepared.
+Both runs must end without anything reaching the channel.
+
+Usage (with src/ on PYTHONPATH):
+    python test/sim_ConcurrentAbort.py
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+from AudioBackend import SimulatedChannel
+from TransmissionOrchestrator import TransmissionOrchestrator
+
+SAMPLE_RATE = 44100
+BASE_FREQ = 111
+
+
+class LiveChannel(SimulatedChannel):
+    """
+    Simulated channel treated as a live input, so the monitor waits on the wall clock.
+    """
+    realtime = True
+
+
+def handshake_tone():
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    return sum(0.1 * np.sin(2 * np.pi * BASE_FREQ * h * t) for h in (3, 6, 9))
+
+
+def abort_mid_listen(wav_path, listen_seconds=5.0, abort_after=0.2):
+    channel = LiveChannel(sample_rate=SAMPLE_RATE, noise_std=0.001, seed=369)  # No handshake: never locks
+    orchestrator = TransmissionOrchestrator(base_freq=BASE_FREQ, sample_rate=SAMPLE_RATE, backend=channel)
+    orchestrator.lock_monitor.duration = listen_seconds
+
+    abort = threading.Event()
+    threading.Timer(abort_after, abort.set).start()
+
+    start = time.perf_counter()
+    emitted = orchestrator.transmit_concurrent(wav_path, abort=abort)
+    elapsed = time.perf_counter() - start
+
+    ok = not emitted and not channel.emitted and elapsed < listen_seconds / 2
+    print(f"  abort during listen: returned {emitted}, {len(channel.emitted)} emission(s), "
+          f"ended after {elapsed:.2f} s of a {listen_seconds:g} s listen -> {'PASS' if ok else 'FAIL'}")
+    return ok
+
+
+def abort_after_lock(wav_path, prepare_delay=0.3, abort_after=0.1):
+    channel = SimulatedChannel(sample_rate=SAMPLE_RATE, noise_std=0.001, handshake=handshake_tone(), seed=369)
+    orchestrator = TransmissionOrchestrator(base_freq=BASE_FREQ, sample_rate=SAMPLE_RATE, backend=channel)
+
+    # Slow the last preparation stage so lock is confirmed while it is still running
+    apply_noise = orchestrator.obfuscator.apply_noise
+
+    def slow_apply_noise(waveform):
+        time.sleep(prepare_delay)
+        return apply_noise(waveform)
+    orchestrator.obfuscator.apply_noise = slow_apply_noise
+
+    abort = threading.Event()
+    threading.Timer(abort_after, abort.set).start()
+
+    emitted = orchestrator.transmit_concurrent(wav_path, abort=abort)
+    outcomes = orchestrator.metrics.outcomes()
+
+    ok = not emitted and not channel.emitted and outcomes.get("emitted", 0) == 0
+    print(f"  abort after lock:    returned {emitted}, {len(channel.emitted)} emission(s), "
+          f"outcomes {outcomes} -> {'PASS' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    print("[TEST] Aborting pipelined transmissions...")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        wav_path = os.path.join(workdir, "message.wav")
+        t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+        sf.write(wav_path, 0.5 * np.sin(2 * np.pi * BASE_FREQ * t), SAMPLE_RATE)
+
+        results = [abort_mid_listen(wav_path), abort_after_lock(wav_path)]
+
+    if all(results):
+        print("[PASS] Nothing was emitted after abort.")
+        return 0
+    print("[FAIL] A transmission was emitted after abort.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+sim_Float32Precision.py
+IX-Futakuchi-onna : Verifies the float32 precision mode end to end and measures what it saves
+Author: Bryce Wooster
+License: See LICENSE file in root directory
+
+Description:
+Runs every pipeline stage with dtype=np.float32 and fails if any stage returns a float64 array or
+performs a float64/complex128 FFT along the way (FFT calls are intercepted and their dtypes recorded).
+Then times each stage in float64 and float32 and reports throughput and peak traced memory.
+
+Usage (with src/ on PYTHONPATH):
+    python test/sim_Float32Precision.py
+    python test/sim_Float32Precision.py --duration 10 --repeats 5
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from AudioBackend import SimulatedChannel
+from FeedbackLockMonitor import FeedbackLockMonitor
+from FieldModulator import FieldModulator
+from FieldUnlockDecoder import FieldUnlockDecoder
+from HarmonicEncoder import HarmonicEncoder
+from HarmonicEncryptor import HarmonicEncryptor
+from SignalObfuscator import SignalObfuscator
+from SignalObfuscator_v2 import SignalObfuscatorV2
+from TransmissionOrchestrator import TransmissionOrchestrator
+from WaveIO import WaveWriter
+
+BASE_FREQ = 111
+SAMPLE_RATE = 44100
+HARMONIC_VECTOR = {3: 0.9, 6: 0.6, 9: 0.4}
+SINGLE = (np.dtype(np.float32), np.dtype(np.complex64))
+
+
+class FFTSpy:
+    """
+    Records (function, input dtype, output dtype) for every np.fft call made inside the context.
+    """
+
+    NAMES = ("fft", "ifft", "rfft", "irfft")
+
+    def __init__(self):
+        self.calls = []
+
+    def __enter__(self):
+        self._originals = {name: getattr(np.fft, name) for name in self.NAMES}
+        for name, func in self._originals.items():
+            setattr(np.fft, name, self._wrap(name, func))
+        return self
+
+    def __exit__(self, *exc):
+        for name, func in self._originals.items():
+            setattr(np.fft, name, func)
+
+    def _wrap(self, name, func):
+        def spy(a, *args, **kwargs):
+            result = func(a, *args, **kwargs)
+            self.calls.append((name, np.asarray(a).dtype, result.dtype))
+            return result
+        return spy
+
+
+def make_input(duration, dtype):
+    t = np.arange(int(SAMPLE_RATE * duration)) / SAMPLE_RATE
+    rng = np.random.default_rng(369)
+    return (0.5 * np.sin(2 * np.pi * BASE_FREQ * t) + 0.05 * rng.standard_normal(len(t))).astype(dtype)
+
+
+def handshake_channel():
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    handshake = sum(0.1 * np.sin(2 * np.pi * BASE_FREQ * h * t) for h in (3, 6, 9))
+    return SimulatedChannel(sample_rate=SAMPLE_RATE, handshake=handshake, noise_std=0.001, seed=369)
+
+
+def build_stages(duration, dtype, workdir):
+    """
+    Returns {stage_name: setup}; setup() prepares inputs and returns a callable producing the stage output.
+    """
+    encrypted = HarmonicEncryptor().encrypt(HARMONIC_VECTOR, BASE_FREQ)
+
+    def encode():
+        encoder = HarmonicEncoder(sample_rate=SAMPLE_RATE, dtype=dtype)
+        waveform = make_input(duration, dtype)
+        return lambda: list(encoder.encode(waveform).values())
+
+    def encode_stream():
+        wav_path = os.path.join(workdir, f"input_{np.dtype(dtype).name}.wav")
+        with WaveWriter(wav_path, SAMPLE_RATE, dtype=dtype) as writer:
+            writer.write(make_input(duration, dtype))
+        encoder = HarmonicEncoder(sample_rate=SAMPLE_RATE, dtype=dtype)
+        return lambda: list(encoder.encode_stream(wav_path).values())
+
+    def modulate():
+        modulator = FieldModulator(base_freq=BASE_FREQ, sample_rate=SAMPLE_RATE, duration=duration, dtype=dtype)
+        return lambda: modulator.modulate_frequencies(encrypted)
+
+    def obfuscate():
+        obfuscator = SignalObfuscator(dtype=dtype)
+        waveform = make_input(duration, dtype)
+        return lambda: obfuscator.apply_noise(waveform)
+
+    def obfuscate_counter():
+        obfuscator = SignalObfuscator(counter_mode=True, dtype=dtype)
+        waveform = make_input(duration, dtype)
+        return lambda: obfuscator.apply_noise(waveform)
+
+    def obfuscate_v2():
+        obfuscator = SignalObfuscatorV2(seed=42, dtype=dtype)
+        waveform = make_input(duration, dtype)
+        return lambda: obfuscator.obfuscate(waveform)
+
+    def decode():
+        signal = SignalObfuscatorV2(seed=42, dtype=dtype).obfuscate(make_input(duration, dtype))
+        decoder = FieldUnlockDecoder(known_seed=42, dtype=dtype)
+        return lambda: decoder.decode(signal)
+
+    def handshake():
+        monitor = FeedbackLockMonitor(sample_rate=SAMPLE_RATE, duration=duration, backend=handshake_channel(),
+                                      dtype=dtype)
+        return lambda: monitor.listen_for_feedback(BASE_FREQ)
+
+    def end_to_end():
+        wav_path = os.path.join(workdir, f"message_{np.dtype(dtype).name}.wav")
+        with WaveWriter(wav_path, SAMPLE_RATE, dtype=dtype) as writer:
+            writer.write(make_input(duration, dtype))
+        channel = handshake_channel()
+        orchestrator = TransmissionOrchestrator(base_freq=BASE_FREQ, sample_rate=SAMPLE_RATE,
+                                                backend=channel, dtype=dtype)
+        orchestrator.modulator.duration = duration
+
+        def run():
+            orchestrator.transmit(wav_path, secure=True, require_lock=True)
+            return channel.emitted[-1]
+        return run
+
+    return {
+        "HarmonicEncoder.encode": encode,
+        "HarmonicEncoder.encode_stream": encode_stream,
+        "FieldModulator.modulate_frequencies": modulate,
+        "SignalObfuscator.apply_noise": obfuscate,
+        "SignalObfuscator.apply_noise[counter]": obfuscate_counter,
+        "SignalObfuscatorV2.obfuscate": obfuscate_v2,
+        "FieldUnlockDecoder.decode": decode,
+        "FeedbackLockMonitor.listen_for_feedback": handshake,
+        "TransmissionOrchestrator.end_to_end": end_to_end,
+    }
+
+
+def output_dtypes(result):
+    """
+    Dtypes of every array (or NumPy scalar) in a stage result.
+    """
+    if isinstance(result, (tuple, list)):
+        return [d for item in result for d in output_dtypes(item)]
+    if isinstance(result, (np.ndarray, np.generic)) and not isinstance(result, np.bool_):
+        return [result.dtype]
+    return []
+
+
+def check_no_upcast(duration):
+    """
+    Runs every stage in float32 mode. Returns the list of upcast violations.
+    """
+    violations = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, setup in build_stages(duration, np.float32, workdir).items():
+            run = setup()
+            with FFTSpy() as spy, contextlib.redirect_stdout(io.StringIO()):
+                result = run()
+
+            problems = [f"returned {d}" for d in output_dtypes(result) if d not in SINGLE]
+            problems += [f"np.fft.{fn}({src}) -> {dst}" for fn, src, dst in spy.calls
+                         if src not in SINGLE or dst not in SINGLE]
+            status = "OK" if not problems else "UPCAST: " + "; ".join(sorted(set(problems)))
+            print(f"  {name:<42} {len(spy.calls):3d} FFT call(s)  {status}")
+            if problems:
+                violations.append(name)
+    return violations
+
+
+def measure(run, repeats):
+    """
+    Best-of-N wall time, plus peak traced memory from one extra traced run.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()  # Warm-up: caches, FFT plans, lazy imports
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return best, peak
+
+
+def compare(duration, repeats):
+    n = int(SAMPLE_RATE * duration)
+    print(f"  {'stage':<42} {'f64 Ms/s':>9} {'f32 Ms/s':>9} {'speedup':>8} {'f64 MB':>8} {'f32 MB':>8} {'memory':>7}")
+    with tempfile.TemporaryDirectory() as workdir:
+        stages64 = build_stages(duration, np.float64, workdir)
+        stages32 = build_stages(duration, np.float32, workdir)
+        for name in stages64:
+            t64, m64 = measure(stages64[name](), repeats)
+            t32, m32 = measure(stages32[name](), repeats)
+            print(f"  {name:<42} {n / t64 / 1e6:9.2f} {n / t32 / 1e6:9.2f} {t64 / t32:7.2f}x"
+                  f" {m64 / 1e6:8.2f} {m32 / 1e6:8.2f} {m32 / m64 if m64 else 0:6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="float32 precision mode check and comparison")
+    parser.add_argument("--duration", type=float, default=5.0, help="Signal length in seconds")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print("[TEST] float32 mode: checking every stage for silent upcasts...")
+    violations = check_no_upcast(args.duration)
+
+    print(f"[BENCH] float64 vs float32 ({args.duration:g} s at {SAMPLE_RATE} Hz)")
+    compare(args.duration, args.repeats)
+
+    if violations:
+        print(f"[FAIL] {len(violations)} stage(s) upcast in float32 mode.")
+        return 1
+    print("[PASS] No stage upcasts in float32 mode.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,15 +10,32 @@ encryption offsets, and obfuscation levels. Supports visual confirmation that 3x
 Tesla frequencies remain dominant or properly masked depending on stage.
 """
 
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.fft import fft
-from scipy.signal import hann
-import soundfile as sf
+from WaveIO import open_wave
 
 
-def analyze_waveform(waveform, sample_rate=44100, title="Harmonic Spectrum"):
-    window = hann(len(waveform))
+def analyze_waveform(waveform, sample_rate=44100, title="Harmonic Spectrum", detector=None):
+    window = np.hanning(len(waveform))
+    base_freq = 111
+
+    if detector is not None:
+        # Sparse mode: read only the Tesla harmonic bins, no full spectrum
+        amplitudes = detector.harmonic_amplitudes(waveform, base_freq, window=window)
+        for mult, amp in amplitudes.items():
+            print(f"{mult}x ({base_freq * mult} Hz): {amp:.3f}")
+
+        plt.figure(figsize=(8, 5))
+        plt.bar([f"{m}x" for m in amplitudes], list(amplitudes.values()), color='cyan')
+        plt.title(title)
+        plt.ylabel("Amplitude")
+        plt.grid(True)
+        plt.tight_layout()
+        plt.show()
+        return amplitudes
+
     windowed = waveform * window
     spectrum = np.abs(fft(windowed))
     freqs = np.fft.fftfreq(len(waveform), d=1.0 / sample_rate)
@@ -36,7 +53,6 @@ def analyze_waveform(waveform, sample_rate=44100, title="Harmonic Spectrum"):
     plt.grid(True)
 
     # Highlight Tesla harmonics
-    base_freq = 111
     for mult in [3, 6, 9]:
         f = base_freq * mult
         plt.axvline(x=f, color='red', linestyle='--', label=f"{mult}x ({f} Hz)")
@@ -49,9 +65,15 @@ def analyze_waveform(waveform, sample_rate=44100, title="Harmonic Spectrum"):
 if __name__ == "__main__":
     # Load waveform output from prior pipeline stage (e.g., obfuscated waveform)
     path = "test/test_output_obfuscated.wav"
-    waveform, sr = sf.read(path)
+    with open_wave(path) as source:
+        waveform = source.read(channel=0, dtype=np.float64)  # First channel; converted out of the mapping
+        sr = source.sample_rate
 
-    if waveform.ndim > 1:
-        waveform = waveform[:, 0]  # Use first channel if stereo
+    # Pass --sparse to read only the 3x/6x/9x bins via HarmonicDetector
+    detector = None
+    if "--sparse" in sys.argv:
+        from HarmonicDetector import HarmonicDetector
+        detector = HarmonicDetector(sample_rate=sr)
 
-    analyze_waveform(waveform, sample_rate=sr, title="Spectrum of Obfuscated Tesla Harmonic Waveform")
+    analyze_waveform(waveform, sample_rate=sr, title="Spectrum of Obfuscated Tesla Harmonic Waveform",
+                     detector=detector)
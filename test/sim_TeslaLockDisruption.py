@@ -10,6 +10,7 @@ Used to confirm that the transmission system correctly denies emission without p
 """
 
 from FieldResonanceDecoder import FieldResonanceDecoder
+from SimulatedGPIO import SimulatedGPIO
 from BeamEmitterController import BeamEmitterController
 import numpy as np
 
@@ -22,8 +23,9 @@ def simulate_waveform():
 if __name__ == "__main__":
     print("[TEST] Simulating Tesla lock failure...")
 
-    decoder = FieldResonanceDecoder()
-    lock_status = decoder.read_gpio_lock()
+    # Lock pin held LOW: the field sensor never reports a return harmonic
+    decoder = FieldResonanceDecoder(gpio=SimulatedGPIO())
+    lock_status = decoder.wait_for_lock(timeout=0.5)
 
     if not lock_status:
         print("[PASS] Lock not achieved — beam emission denied as expected.")
@@ -21,11 +21,10 @@ noise_key = "OBF-369"
 # Step 1: Encrypt harmonics
 encryptor = HarmonicEncryptor(encryption_key=encryption_key)
 encrypted = encryptor.encrypt(harmonic_vector, base_freq=base_freq)
-decrypted_vector = encryptor.decrypt(encrypted, base_freq=base_freq)
 
-# Step 2: Modulate to waveform
+# Step 2: Modulate encrypted frequencies straight to waveform
 modulator = FieldModulator(base_freq=base_freq, sample_rate=sample_rate, duration=duration)
-waveform = modulator.modulate(decrypted_vector)
+waveform = modulator.modulate_frequencies(encrypted)
 
 # Step 3: Obfuscate signal
 obfuscator = SignalObfuscator(noise_key=noise_key, noise_strength=0.25)